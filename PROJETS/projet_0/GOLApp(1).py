@@ -1,367 +1,508 @@
-    import sys 
-    from GOLEngine import GOLEngine
-
-    from PySide6.QtCore import Qt, QTimer, Signal
-
-    from PySide6.QtGui import QImage, QPixmap, QColor
-    from PySide6.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QHBoxLayout, QWidget, QGroupBox, QVBoxLayout, QScrollBar, QComboBox, QSpacerItem, QSizePolicy
-
-    from __feature__ import snake_case, true_property
-
-
-
-    class ControlWidget(QGroupBox):
-        # signal pour chacun des bouttons
-        startedStopped = Signal() # boutton start / stop
-        stepRequested = Signal() # boutton One single step
-        speedChanged = Signal(int) # boutton scroll bar speed
-        
-        def __init__(self):
-            super().__init__(None)
-            
-            self.title = "Control"
-            
-            # buttons et options
-            self.__button_start_stop = QPushButton("Start")
-            self.__button_step = QPushButton("One single step")
+import sys 
+import time
+from GOLEngineNumpy import GOLEngineNumpy as GOLEngine
+from GOLRule import PRESETS
+from GOLSimulation import GOLSimulation
+
+from PySide6.QtCore import Qt, QTimer, Signal, QPoint, QRect
+
+from PySide6.QtGui import QImage, QColor, QPainter
+from PySide6.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QHBoxLayout, QWidget, QGroupBox, QVBoxLayout, QScrollBar, QComboBox, QCheckBox, QSpacerItem, QSizePolicy, QFileDialog, QMessageBox
+
+from __feature__ import snake_case, true_property
+
+
+FRAME_INTERVAL = 16 # ms entre deux affichages (~60 images/s)
+FILE_FILTER = "Patterns (*.rle *.cells);;Snapshots (*.gol)"
+
+
+
+class ControlWidget(QGroupBox):
+    # signal pour chacun des bouttons
+    startedStopped = Signal() # boutton start / stop
+    stepRequested = Signal() # boutton One single step
+    speedChanged = Signal(int) # boutton scroll bar speed
+    autoStopChanged = Signal(bool) # case à cocher arrêt automatique
+    
+    def __init__(self):
+        super().__init__(None)
+        
+        self.title = "Control"
+        
+        # buttons et options
+        self.__button_start_stop = QPushButton("Start")
+        self.__button_step = QPushButton("One single step")
+        self.__button_step.enabled = True
+        # au lieu de faire : self.__speed.orientation = Qt.Horizontal
+        self.__speed = QScrollBar(Qt.Horizontal)
+        self.__speed.set_range(1,100)
+        self.__speed.value = 1
+        self.__speed_label = QLabel("1x")
+        self.__speed_label.alignment = Qt.AlignCenter
+        self.__auto_stop = QCheckBox("Stop when stable")
+        
+        # connection signal -> slot
+        self.__button_start_stop.clicked.connect(self.__toggle_start_stop)
+        self.__button_step.clicked.connect(self.__request_step)
+        self.__speed.valueChanged.connect(self.__update_speed)
+        self.__auto_stop.toggled.connect(self.autoStopChanged.emit)
+        
+        # layout central
+        layout_central = QVBoxLayout()
+        layout_central.add_widget(self.__button_start_stop)
+        layout_central.add_widget(self.__button_step)
+        layout_central.add_widget(self.__speed)
+        layout_central.add_widget(self.__speed_label)
+        layout_central.add_widget(self.__auto_stop)
+        self.set_layout(layout_central)
+        
+        self.__running = False  # Indicateur de l'état du jeu
+    
+    # fonctions pour connection / emission signal avec GOLApp
+    def __toggle_start_stop(self):
+        self.__show_running(not self.__running)
+
+        # emmission d'un signal à la classe principale
+        # self. nom de signal + .emit()
+        self.startedStopped.emit()
+    
+    def set_stopped(self):
+        # arrêt décidé par GOLApp (sans émettre startedStopped)
+        self.__show_running(False)
+    
+    def __show_running(self, running):
+        if running:
+            self.__button_start_stop.text = "Stop"
+            self.__button_step.enabled = False
+        else:
+            self.__button_start_stop.text = "Start"
             self.__button_step.enabled = True
-            # au lieu de faire : self.__speed.orientation = Qt.Horizontal
-            self.__speed = QScrollBar(Qt.Horizontal)
-            self.__speed.set_range(1,6)
-            self.__speed.value = 1
-            self.__speed_label = QLabel("1x")
-            self.__speed_label.alignment = Qt.AlignCenter
-            
-            # connection signal -> slot
-            self.__button_start_stop.clicked.connect(self.__toggle_start_stop)
-            self.__button_step.clicked.connect(self.__request_step)
-            self.__speed.valueChanged.connect(self.__update_speed)
-            
-            # layout central
-            layout_central = QVBoxLayout()
-            layout_central.add_widget(self.__button_start_stop)
-            layout_central.add_widget(self.__button_step)
-            layout_central.add_widget(self.__speed)
-            layout_central.add_widget(self.__speed_label)
-            self.set_layout(layout_central)
-            
-            self.__running = False  # Indicateur de l'état du jeu
-        
-        # fonctions pour connection / emission signal avec GOLApp
-        def __toggle_start_stop(self):
-            if self.__running:
-                self.__button_start_stop.text = "Start"
-                self.__button_step.enabled = True
-            else:
-                self.__button_start_stop.text = "Stop"
-                self.__button_step.enabled = False
-            
-            self.__running = not self.__running
-
-            # emmission d'un signal à la classe principale
-            # self. nom de signal + .emit()
-            self.startedStopped.emit()
-        
-        def __request_step(self):
-            # emmission d'un signal à la classe principale
-            # self. nom de signal + .emit()
-            self.stepRequested.emit()
-        
-        def __update_speed(self):
-            self.__speed_label.text = f"{self.__speed.value}x"
-            # emmission d'un signal à la classe principale
-            # self. nom de signal + .emit()
-            self.speedChanged.emit(self.__speed.value)
-            
-
-
-
-
-    class InformationWidget(QGroupBox):  
-        def __init__(self):
-            super().__init__(None)
-            
-            self.title = "Informations"
-            
-            self.__generation = QLabel("Generation : 0")
-            self.__cell_count = QLabel("Cell count : 0")
-            self.__dead = QLabel("Dead : 0 (0.0 %)")
-            self.__alive = QLabel("Alive : 0 (0.0 %)")
+        self.__running = running
+    
+    def __request_step(self):
+        # emmission d'un signal à la classe principale
+        # self. nom de signal + .emit()
+        self.stepRequested.emit()
+    
+    def __update_speed(self):
+        self.__speed_label.text = f"{self.__speed.value}x"
+        # emmission d'un signal à la classe principale
+        # self. nom de signal + .emit()
+        self.speedChanged.emit(self.__speed.value)
+        
+
+
+
+
+class InformationWidget(QGroupBox):  
+    def __init__(self):
+        super().__init__(None)
+        
+        self.title = "Informations"
+        
+        self.__generation = QLabel("Generation : 0")
+        self.__cell_count = QLabel("Cell count : 0")
+        self.__dead = QLabel("Dead : 0 (0.0 %)")
+        self.__alive = QLabel("Alive : 0 (0.0 %)")
+        self.__period = QLabel("Period : -")
+        self.__generations_per_second = QLabel("Generations/s : 0.0")
+        self.__fps = QLabel("FPS : 0.0")
+        self.__render_time = QLabel("Render : 0.0 ms")
+     
+        # connection signal -> slot
+
+        
+        # layout central
+        layout_central = QVBoxLayout()
+        layout_central.add_widget(self.__generation)
+        layout_central.add_widget(self.__cell_count)
+        layout_central.add_widget(self.__dead)
+        layout_central.add_widget(self.__alive)
+        layout_central.add_widget(self.__period)
+        layout_central.add_widget(self.__generations_per_second)
+        layout_central.add_widget(self.__fps)
+        layout_central.add_widget(self.__render_time)
+        self.set_layout(layout_central)
+    
+    def update_informations(self, generation, total_cells, dead_cells, alive_cells, period=None):
+        self.__generation.text = f"Generation: {generation:^20}"
+        self.__cell_count.text = f"Cell count: {total_cells:^20}"
+        self.__dead.text = f"Dead: {dead_cells} ({round(dead_cells/total_cells*100, 1)}%)"
+        self.__alive.text = f"Alive: {alive_cells} ({round(alive_cells/total_cells*100, 1)}%)"
+        self.__period.text = f"Period: {period if period is not None else '-'}"
+    
+    def update_performance(self, generations_per_second, fps, render_time):
+        self.__generations_per_second.text = f"Generations/s: {generations_per_second:.1f}"
+        self.__fps.text = f"FPS: {fps:.1f}"
+        self.__render_time.text = f"Render: {render_time * 1000:.2f} ms"
+
+    
+    
+    
+    
+class PatternWidget(QGroupBox):
+    # signal pour chacun des bouttons
+    randomize = Signal(float)
+    setDead = Signal() 
+    setAlive = Signal() 
+    loadRequested = Signal() 
+    saveRequested = Signal() 
+    
+    def __init__(self):
+        super().__init__(None)
+        
+        self.title = "Pattern"
+        
+        self.__randomize = QScrollBar(Qt.Horizontal)
+        self.__randomize.set_range(0,100)
+        self.__randomize.value = 50
+        self.__randomize_button = QPushButton()
+        self.__randomize_button.text = f"Randomize {self.__randomize.value}%"
+        self.__button_all_dead = QPushButton("Set all dead")
+        self.__button_all_alive = QPushButton("Set all alive")
+        self.__button_load = QPushButton("Load...")
+        self.__button_save = QPushButton("Save...")
+        
+        # connection signal -> slot
+        self.__randomize_button.clicked.connect(self.__randomize_all)
+        self.__button_all_dead.clicked.connect(self.__all_dead)
+        self.__button_all_alive.clicked.connect(self.__all_alive)
+        self.__button_load.clicked.connect(self.loadRequested.emit)
+        self.__button_save.clicked.connect(self.saveRequested.emit)
+        self.__randomize.valueChanged.connect(self.__update_randomize_button)
+        
+        # layout central
+        layout_central = QVBoxLayout()
+        layout_central.add_widget(self.__randomize)
+        layout_central.add_widget(self.__randomize_button)
+        layout_central.add_widget(self.__button_all_dead)
+        layout_central.add_widget(self.__button_all_alive)
+        layout_central.add_widget(self.__button_load)
+        layout_central.add_widget(self.__button_save)
+        self.set_layout(layout_central)
+    
+     # fonctions pour connection / emission signal avec GOLApp
+    def __randomize_all(self):
+        self.randomize.emit(self.__randomize.value / 100.0)
+    
+    def __all_dead(self):
+        self.setDead.emit()
+    
+    def __all_alive(self):
+        self.setAlive.emit()
+    
+    def __update_randomize_button(self):
+        self.__randomize_button.text = f"Randomize {self.__randomize.value}%"
+
+
+
+
+
+class ParametersWidget(QGroupBox):  
+    # signal pour chacun des parameters
+    mapSize = Signal(int, int) # map size
+    ruleChanged = Signal(str) # rulestring (B.../S...)
+    
+    def __init__(self):
+        super().__init__(None)
+        
+        self.title = "Parameters"
+        
+        self.__map_size = QComboBox()
+        self.__map_size_text = QLabel("Map size")
+        self.__map_size.add_items(["100 x 100", "200 x 200", "300 x 300", "400 x 400", "500 x 500"])
+        self.__rule_text = QLabel("Rule")
+        self.__rule = QComboBox()
+        self.__rule.add_items([f"{name} ({rule})" for name, rule in PRESETS])
+        
+        # connection signal -> slot
+        self.__map_size.currentIndexChanged.connect(self.__map_size_change)
+        self.__rule.currentIndexChanged.connect(self.__rule_change)
+        
+        # layout central
+        layout_central = QVBoxLayout()
+        layout_central.add_widget(self.__map_size_text)
+        layout_central.add_widget(self.__map_size)
+        layout_central.add_widget(self.__rule_text)
+        layout_central.add_widget(self.__rule)
+        self.set_layout(layout_central)
+    
+    def __map_size_change(self, index):
+        # fonction combo box map size change
+        if index == 0:
+            self.mapSize.emit(100, 100)
+        elif index == 1:
+            self.mapSize.emit(200, 200)
+        elif index == 2:
+            self.mapSize.emit(300, 300)
+        elif index == 3:
+            self.mapSize.emit(400, 400)
+        elif index == 4:
+            self.mapSize.emit(500, 500)
+    
+    def __rule_change(self, index):
+        # fonction combo box rule change
+        self.ruleChanged.emit(PRESETS[index][1])
+        
+
+    
+
+        
+
+    
+
+
+    
+
+        
+
+class GridWidget(QWidget):
+    # grille à l'échelle 1:1, centrée dans le widget
+    # l'image persistante n'appartient qu'à ce widget : les régions modifiées y
+    # sont peintes sur place (sans copie de l'image) et seuls leurs rectangles
+    # sont redessinés à l'écran (update(QRect))
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__image = QImage()
+    
+    def __origin(self):
+        # coin haut-gauche de l'image dans le widget
+        return QPoint((self.width - self.__image.width()) // 2, (self.height - self.__image.height()) // 2)
+    
+    def show_frame(self, frame, regions):
+        # frame : image de toute la grille ; regions : rectangles (x, y, largeur, hauteur) modifiés
+        if self.__image.size() != frame.size():
+            # nouvelle taille : copie complète (l'image ne garde pas le tampon de frame)
+            self.__image = frame.convert_to_format(QImage.Format_RGB32)
+            self.minimum_size = self.__image.size()
+            self.update()
+            return
+        if not regions:
+            return
+        rects = [QRect(x, y, width, height) for x, y, width, height in regions]
+        painter = QPainter(self.__image)
+        for rect in rects:
+            painter.draw_image(rect.top_left(), frame, rect)
+        painter.end()
+        origin = self.__origin()
+        for rect in rects:
+            self.update(rect.translated(origin))
+    
+    def paint_event(self, event):
+        # seule la partie exposée de l'image est recopiée à l'écran
+        origin = self.__origin()
+        target = event.rect().intersected(QRect(origin, self.__image.size()))
+        if target.is_empty():
+            return
+        painter = QPainter(self)
+        painter.draw_image(target, self.__image, target.translated(-origin.x(), -origin.y()))
+        painter.end()
+
+
+
+
+
+class GOLApp(QMainWindow):
+    def __init__(self) :
+        super().__init__(None)
+        
+        self.set_window_title("Game of life")
+        
+        engine = GOLEngine(100, 100) 
+        engine.randomize()
+        
+        # le moteur tourne dans son propre thread ; l'interface n'affiche que
+        # le dernier snapshot publié (voir GOLSimulation)
+        self.__simulation = GOLSimulation(engine)
+        self.__simulation.start()
+        
+        # palette de l'image : index 0 (morte) -> noir, index 1 (vivante) -> blanc
+        self.__palette = [QColor(0, 0, 0).rgb(), QColor(255, 255, 255).rgb()]
+        
+        self.__last_frame = None # instant du dernier affichage (pour les FPS)
+        self.__fps = 0.0
+        
+        # Widget pour afficher le jeu (image persistante, voir GridWidget)
+        self.__container = GridWidget()
+        
+        # création widgets
+        self.__control_widget = ControlWidget()
+        self.__informations_widget = InformationWidget()
+        self.__pattern_widget = PatternWidget()
+        self.__parameters_widget = ParametersWidget()
+        
+        # connection slots <- signal
+        self.__control_widget.startedStopped.connect(self.__start_stop)
+        self.__control_widget.stepRequested.connect(self.__one_step)
+        self.__control_widget.speedChanged.connect(self.__change_speed)
+        self.__control_widget.autoStopChanged.connect(self.__change_auto_stop)
+        self.__simulation.stabilized.connect(self.__stabilized)
+        
+        self.__pattern_widget.randomize.connect(self.__new_randomize)
+        self.__pattern_widget.setDead.connect(self.__all_rip)
+        self.__pattern_widget.setAlive.connect(self.__all_born)
+        self.__pattern_widget.loadRequested.connect(self.__load)
+        self.__pattern_widget.saveRequested.connect(self.__save)
+        
+        self.__parameters_widget.mapSize.connect(self.__resize_game)
+        self.__parameters_widget.ruleChanged.connect(self.__change_rule)
+        
+        
+        ##### timer ################
+        # rafraîchissement de l'affichage, indépendant de la vitesse de simulation
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.__update)
+        self.__timer.start(FRAME_INTERVAL)
+        self.__speed = 0.1 # s par génération à 1x
+        self.__simulation.interval = self.__speed
+        
+        
+        ######LAYOUTS##########
+         # Layout 1 
+        layout_1 = QVBoxLayout()
+        layout_1.add_widget(self.__control_widget)
+        layout_1.add_widget(self.__parameters_widget)
+        
+        # Layout 2
+        layout_2 = QVBoxLayout()
+        layout_2.add_widget(self.__pattern_widget)
+        
+        # Layout 3
+        layout_3 = QVBoxLayout()
+        layout_3.add_widget(self.__informations_widget)
+        
+        # Main Layout
+        main_layout = QHBoxLayout()
+        main_layout.add_layout(layout_1)
+        main_layout.add_layout(layout_2)
+        main_layout.add_widget(self.__container)
+        main_layout.add_layout(layout_3)
+              
+              
+    
+        ###### CENTRAL WIDGET #########        
+        # Créer un widget central avec le layout
+        central_widget = QWidget()
+        central_widget.set_layout(main_layout)
+        self.set_central_widget(central_widget)
+
+
+
+
+    
+    ######## FONCTIONS CONTROL WIDGET ########    
+    def __start_stop(self):
+        if self.__simulation.running:
+            self.__simulation.stop_simulation()
+        else:
+            self.__simulation.start_simulation()
+    
+    def __one_step(self):
+        if not self.__simulation.running: 
+            self.__simulation.modify(lambda engine: engine.process())
+    
+    def __change_speed(self, value):
+        self.__simulation.interval = self.__speed / value
+    
+    def __change_auto_stop(self, checked):
+        self.__simulation.auto_stop = checked
+    
+    def __stabilized(self, period):
+        self.__control_widget.set_stopped()
+    
+        
+    
+    
+    ######## FONCTIONS PATTERN WIDGET ########    
+    def __new_randomize(self, value):
+        self.__simulation.modify(lambda engine: engine.randomize(value))
+    
+    def __all_rip(self):
+        self.__simulation.modify(lambda engine: engine.fill_rect(0, 0, engine.width, engine.height, 0))
+    
+    def __all_born(self):
+        self.__simulation.modify(lambda engine: engine.fill_rect(0, 0, engine.width, engine.height, 1))
+    
+    def __load(self):
+        path, _ = QFileDialog.get_open_file_name(self, "Load", "", FILE_FILTER)
+        if path:
+            try:
+                self.__simulation.modify(lambda engine: engine.load(path))
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(self, "Load", str(error))
+    
+    def __save(self):
+        path, _ = QFileDialog.get_save_file_name(self, "Save", "", FILE_FILTER)
+        if path:
+            try:
+                self.__simulation.modify(lambda engine: engine.save(path))
+            except (OSError, ValueError) as error:
+                QMessageBox.warning(self, "Save", str(error))
+    
+
+
+
+
+    ######## FONCTION PARAMETERS WIDGET ########   
+    def __resize_game(self, width, height):
+        engine = GOLEngine(width, height, self.__simulation.engine.rule)
+        engine.randomize()
+        self.__simulation.set_engine(engine)
+    
+    def __change_rule(self, rule):
+        # la règle est compilée une seule fois en LUT par le moteur
+        def change_rule(engine):
+            engine.rule = rule
+        self.__simulation.modify(change_rule)
+    
+    
+    
+    
+    
+    
+    ######## GENERAL GAME FUNCTIONS ########         
+    def close_event(self, event):
+        self.__simulation.shutdown()
+        super().close_event(event)
          
-            # connection signal -> slot
-
-            
-            # layout central
-            layout_central = QVBoxLayout()
-            layout_central.add_widget(self.__generation)
-            layout_central.add_widget(self.__cell_count)
-            layout_central.add_widget(self.__dead)
-            layout_central.add_widget(self.__alive)
-            self.set_layout(layout_central)
-        
-        def update_informations(self, generation, total_cells, dead_cells, alive_cells):
-            self.__generation.text = f"Generation: {generation:^20}"
-            self.__cell_count.text = f"Cell count: {total_cells:^20}"
-            self.__dead.text = f"Dead: {dead_cells} ({round(dead_cells/total_cells*100, 1)}%)"
-            self.__alive.text = f"Alive: {alive_cells} ({round(alive_cells/total_cells*100, 1)}%)"
-
-        
-        
-        
-        
-    class PatternWidget(QGroupBox):
-        # signal pour chacun des bouttons
-        randomize = Signal(float)
-        setDead = Signal() 
-        setAlive = Signal() 
-        
-        def __init__(self):
-            super().__init__(None)
-            
-            self.title = "Pattern"
-            
-            self.__randomize = QScrollBar(Qt.Horizontal)
-            self.__randomize.set_range(0,100)
-            self.__randomize.value = 50
-            self.__randomize_button = QPushButton()
-            self.__randomize_button.text = f"Randomize {self.__randomize.value}%"
-            self.__button_all_dead = QPushButton("Set all dead")
-            self.__button_all_alive = QPushButton("Set all alive")
-            
-            # connection signal -> slot
-            self.__randomize_button.clicked.connect(self.__randomize_all)
-            self.__button_all_dead.clicked.connect(self.__all_dead)
-            self.__button_all_alive.clicked.connect(self.__all_alive)
-            self.__randomize.valueChanged.connect(self.__update_randomize_button)
-            
-            # layout central
-            layout_central = QVBoxLayout()
-            layout_central.add_widget(self.__randomize)
-            layout_central.add_widget(self.__randomize_button)
-            layout_central.add_widget(self.__button_all_dead)
-            layout_central.add_widget(self.__button_all_alive)
-            self.set_layout(layout_central)
-        
-         # fonctions pour connection / emission signal avec GOLApp
-        def __randomize_all(self):
-            self.randomize.emit(self.__randomize.value / 100.0)
-        
-        def __all_dead(self):
-            self.setDead.emit()
-        
-        def __all_alive(self):
-            self.setAlive.emit()
-        
-        def __update_randomize_button(self):
-            self.__randomize_button.text = f"Randomize {self.__randomize.value}%"
-
-
-
-
-
-    class ParametersWidget(QGroupBox):  
-        # signal pour chacun des parameters
-        mapSize = Signal(int, int) # map size
-        
-        def __init__(self):
-            super().__init__(None)
-            
-            self.title = "Parameters"
-            
-            self.__map_size = QComboBox()
-            self.__map_size_text = QLabel("Map size")
-            self.__map_size.add_items(["100 x 100", "200 x 200", "300 x 300", "400 x 400", "500 x 500"])
-            self.__rule_text = QLabel("Rule")
-            
-            # connection signal -> slot
-            self.__map_size.currentIndexChanged.connect(self.__map_size_change)
-            
-            # layout central
-            layout_central = QVBoxLayout()
-            layout_central.add_widget(self.__map_size_text)
-            layout_central.add_widget(self.__map_size)
-            layout_central.add_widget(self.__rule_text)
-            self.set_layout(layout_central)
-        
-        def __map_size_change(self, index):
-            # fonction combo box map size change
-            if index == 0:
-                self.mapSize.emit(100, 100)
-            elif index == 1:
-                self.mapSize.emit(200, 200)
-            elif index == 2:
-                self.mapSize.emit(300, 300)
-            elif index == 3:
-                self.mapSize.emit(400, 400)
-            elif index == 4:
-                self.mapSize.emit(500, 500)
-            
-
-        
-
-            
-
-        
-
-
-        
-
-            
-
-    class GOLApp(QMainWindow):
-        def __init__(self) :
-            super().__init__(None)
-            
-            self.set_window_title("Game of life")
-            
-            self.__engine = GOLEngine(100, 100) 
-            self.__engine.randomize()
-            
-            # Label pour afficher le jeu
-            self.__container = QLabel()
-            self.__container.alignment = Qt.AlignCenter
-            
-            # création widgets
-            self.__control_widget = ControlWidget()
-            self.__informations_widget = InformationWidget()
-            self.__pattern_widget = PatternWidget()
-            self.__parameters_widget = ParametersWidget()
-            
-            # connection slots <- signal
-            self.__control_widget.startedStopped.connect(self.__start_stop)
-            self.__control_widget.stepRequested.connect(self.__one_step)
-            self.__control_widget.speedChanged.connect(self.__change_speed)
-            
-            self.__pattern_widget.randomize.connect(self.__new_randomize)
-            self.__pattern_widget.setDead.connect(self.__all_rip)
-            self.__pattern_widget.setAlive.connect(self.__all_born)
-            
-            self.__parameters_widget.mapSize.connect(self.__resize_game)
-            
-            
-            ##### timer ################
-            self.__timer = QTimer(self)
-            self.__timer.timeout.connect(self.__process_game)
-            self.__speed = 100
-            
-            self.__running = False
-            
-            
-            ######LAYOUTS##########
-             # Layout 1 
-            layout_1 = QVBoxLayout()
-            layout_1.add_widget(self.__control_widget)
-            layout_1.add_widget(self.__parameters_widget)
-            
-            # Layout 2
-            layout_2 = QVBoxLayout()
-            layout_2.add_widget(self.__pattern_widget)
-            
-            # Layout 3
-            layout_3 = QVBoxLayout()
-            layout_3.add_widget(self.__informations_widget)
-            
-            # Main Layout
-            main_layout = QHBoxLayout()
-            main_layout.add_layout(layout_1)
-            main_layout.add_layout(layout_2)
-            main_layout.add_widget(self.__container)
-            main_layout.add_layout(layout_3)
-                  
-                  
-        
-            ###### CENTRAL WIDGET #########        
-            # Créer un widget central avec le layout
-            central_widget = QWidget()
-            central_widget.set_layout(main_layout)
-            self.set_central_widget(central_widget)
-
-
-
-
-        
-        ######## FONCTIONS CONTROL WIDGET ########    
-        def __start_stop(self):
-            if self.__running:
-                self.__timer.stop()
-            else:
-                self.__timer.start(self.__speed)
-            self.__running = not self.__running
-        
-        def __one_step(self):
-            if not self.__running: 
-                self.__process_game()
-        
-        def __change_speed(self, value):
-            if self.__running:
-                self.__timer.start(self.__speed/value) 
-        
-            
-        
-        
-        ######## FONCTIONS PATTERN WIDGET ########    
-        def __new_randomize(self, value):
-            self.__engine.randomize(value)
-            self.__update()
-        
-        def __all_rip(self):
-            for y in range(self.__engine.height):
-                for x in range(self.__engine.width):
-                    self.__engine.set_cell(x, y, 0) 
-            self.__update()
-        
-        def __all_born(self):
-            for y in range(self.__engine.height):
-                for x in range(self.__engine.width):
-                    self.__engine.set_cell(x, y, 1) 
-            self.__update()
-        
-
-
-
-
-        ######## FONCTION PARAMETERS WIDGET ########   
-        def __resize_game(self, width, height):
-            self.__engine = GOLEngine(width, height)
-            self.__engine.randomize()
-            self.__update()
-        
-        
-        
-        
-        
-        
-        ######## GENERAL GAME FUNCTIONS ########         
-        def __process_game(self):
-            self.__engine.process()
-            self.__update()
-             
-        def __update(self):
-            black_color = QColor(0, 0, 0)
-            white_color = QColor(255, 255, 255)
-            image = QImage(self.__engine.width, self.__engine.height, QImage.Format_ARGB32)
-            for x in range(self.__engine.width):
-                for y in range(self.__engine.height):
-                    cell_color = white_color if self.__engine.get_cell(x, y) else black_color
-                    image.set_pixel_color(x, y, cell_color)
-            pixmap = QPixmap.from_image(image) # Conversion du QImage en QPixmap
-            self.__container.pixmap = pixmap
-            
-            # update informations
-            generation = self.__engine.iterations
-            total_cells = self.__engine.live_cells + self.__engine.dead_cells
-            dead_cells = self.__engine.dead_cells
-            alive_cells = self.__engine.live_cells
-            self.__informations_widget.update_informations(generation, total_cells, dead_cells, alive_cells)
-           
-
-    def main():
-        app = QApplication(sys.argv)
-        window = GOLApp()
-        window.show()
-        
-        result = app.exec()
-        sys.exit(result)
-
-    if __name__ == '__main__':
-        main()
+    def __update(self):
+        snapshot = self.__simulation.take_snapshot()
+        if snapshot is None:
+            return # rien de nouveau depuis le dernier affichage
+        cells, regions, generation, alive_cells, dead_cells, period = snapshot
+        start = time.perf_counter()
+        
+        # le snapshot (uint8, 0 ou 1) sert directement de tampon à une image
+        # indexée : aucun appel par pixel, la palette fait la conversion
+        height, width = cells.shape
+        image = QImage(cells, width, height, width, QImage.Format_Indexed8)
+        image.set_color_table(self.__palette)
+        
+        # seules les régions modifiées depuis le dernier affichage sont redessinées
+        self.__container.show_frame(image, regions)
+        self.__simulation.release_snapshot()
+        
+        # performances : générations par seconde (thread de simulation), images
+        # par seconde (moyenne lissée) et temps de rendu
+        now = time.perf_counter()
+        if self.__last_frame is not None and now > self.__last_frame:
+            self.__fps = 0.9 * self.__fps + 0.1 / (now - self.__last_frame)
+        self.__last_frame = now
+        self.__informations_widget.update_performance(self.__simulation.generations_per_second,
+                                                      self.__fps, now - start)
+        
+        # update informations (compteurs publiés avec le snapshot)
+        total_cells = alive_cells + dead_cells
+        self.__informations_widget.update_informations(generation, total_cells, dead_cells, alive_cells, period)
+       
+
+def main():
+    app = QApplication(sys.argv)
+    window = GOLApp()
+    window.show()
+    
+    result = app.exec()
+    sys.exit(result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from GOLEngineNumpy import GOLEngineNumpy
+from GOLEngineBitPacked import GOLEngineBitPacked
+from GOLEngineParallel import GOLEngineParallel
+from GOLEngineSparse import GOLEngineSparse
+from GOLHashLife import GOLHashLife
+
+# Banc d'essai des moteurs du jeu de la vie.
+#
+# Pour chaque variante de moteur, chaque taille de grille et chaque densité :
+# - temps de randomize(), d'une génération (process()) et de live_cells
+# - générations par seconde et cellules par seconde
+#
+# Avant les mesures, chaque variante est comparée cellule par cellule à
+# l'oracle naïf (triple boucle de solutions/gol_engine_solution.py) sur
+# quelques générations. Les moteurs sur plan infini (HashLife, clairsemé)
+# n'ont pas de bordure morte : la soupe de vérification est placée au centre
+# avec une marge plus large que la distance parcourue à la vitesse de la
+# lumière, la bordure n'intervient donc jamais.
+#
+# Le rapport est écrit en JSON ; avec --baseline, les temps de process()
+# sont comparés à un rapport précédent et le code de sortie vaut 1 si une
+# variante a ralenti de plus de --tolerance.
+#
+#   python GOLBenchmark.py --sizes 100 500 2000 --output report.json
+#   python GOLBenchmark.py --baseline report.json
+
+SIZES = (100, 500, 1000, 2000)
+DENSITIES = (0.5, 0.9) # paramètre percent de randomize() : proportion de cellules mortes
+MIN_TIME = 0.2 # s de mesure minimale par opération (répétée au besoin)
+CHECK_SIZE = 64 # côté de la grille de vérification
+CHECK_GENERATIONS = 12 # générations comparées à l'oracle
+TOLERANCE = 0.25 # ralentissement toléré par rapport au rapport de référence
+
+SOLUTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'solutions')
+
+
+def _load_class(path, name):
+    # les fichiers de référence ne sont pas des modules importables (nom ou dossier)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, name)
+
+
+class _Variant:
+    # adaptateur commun : les variantes n'exposent pas toutes la même interface
+    def __init__(self, name, create, max_size, get_cell='get_cell', set_cell='set_cell',
+                 bounded=True, randomize=True, live_cells=True, close=None):
+        self.name = name
+        self.create = create # (largeur, hauteur) -> moteur
+        self.max_size = max_size # au-delà, la variante est trop lente pour être mesurée
+        self.get_cell = get_cell
+        self.set_cell = set_cell
+        self.bounded = bounded # grille à bordure morte (sinon plan infini)
+        self.randomize = randomize
+        self.live_cells = live_cells
+        self.close = close or (lambda engine: None)
+
+
+def _variants():
+    solution = _load_class(os.path.join(SOLUTIONS, 'gol_engine_solution.py'), 'GOLEngine')
+    solution_2 = _load_class(os.path.join(SOLUTIONS, 'gol_engine_solution_2.py'), 'GOLEngine')
+    engine = _load_class(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'GOLEngine(1).py'), 'GOLEngine')
+    return (
+        _Variant('solution', solution, 500, 'get_cell_value', 'set_cell_value', live_cells=False),
+        _Variant('solution_2', solution_2, 500, 'cell_value', 'set_cell_value', live_cells=False),
+        _Variant('GOLEngine', engine, 500),
+        _Variant('GOLEngineNumpy', GOLEngineNumpy, 2000),
+        _Variant('GOLEngineBitPacked', GOLEngineBitPacked, 65536),
+        _Variant('GOLEngineParallel', GOLEngineParallel, 20000, close=lambda engine: engine.close()),
+        _Variant('GOLEngineSparse', lambda width, height: GOLEngineSparse(), 300,
+                 bounded=False, randomize=False),
+        _Variant('GOLHashLife', lambda width, height: GOLHashLife(), 200,
+                 bounded=False, randomize=False),
+    )
+
+
+def _seed(variant, engine, cells):
+    set_cell = getattr(engine, variant.set_cell)
+    for y, x in zip(*np.nonzero(cells)):
+        set_cell(int(x), int(y), 1)
+
+
+def _read(variant, engine, width, height):
+    get_cell = getattr(engine, variant.get_cell)
+    return np.array([[get_cell(x, y) for x in range(width)] for y in range(height)], dtype=np.uint8)
+
+
+def _soup(width, height, percent, margin, seed=0):
+    # cellules vivantes au hasard, bordure morte de largeur margin
+    cells = np.zeros((height, width), dtype=np.uint8)
+    rng = np.random.default_rng(seed)
+    cells[margin:height - margin, margin:width - margin] = \
+        rng.random((height - 2 * margin, width - 2 * margin)) > percent
+    return cells
+
+
+def check(variants, oracle):
+    # True si la variante est identique à l'oracle à chaque génération, sinon le message d'erreur
+    margin = CHECK_GENERATIONS + 2
+    soup = _soup(CHECK_SIZE, CHECK_SIZE, 0.5, margin)
+    reference = oracle.create(CHECK_SIZE, CHECK_SIZE)
+    _seed(oracle, reference, soup)
+    expected = []
+    for _ in range(CHECK_GENERATIONS):
+        reference.process()
+        expected.append(_read(oracle, reference, CHECK_SIZE, CHECK_SIZE))
+
+    results = {}
+    for variant in variants:
+        engine = variant.create(CHECK_SIZE, CHECK_SIZE)
+        try:
+            _seed(variant, engine, soup)
+            results[variant.name] = True
+            for generation, cells in enumerate(expected, 1):
+                engine.process()
+                mismatches = int(np.count_nonzero(_read(variant, engine, CHECK_SIZE, CHECK_SIZE) != cells))
+                if mismatches:
+                    results[variant.name] = f'{mismatches} cells differ at generation {generation}'
+                    break
+        finally:
+            variant.close(engine)
+    return results
+
+
+def _measure(function):
+    # durée moyenne d'un appel, répété jusqu'à MIN_TIME
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME:
+            return elapsed / calls
+
+
+def bench(variant, size, percent):
+    engine = variant.create(size, size)
+    try:
+        result = {'variant': variant.name, 'width': size, 'height': size, 'percent': percent}
+        if variant.randomize:
+            result['randomize_ms'] = _measure(lambda: engine.randomize(percent)) * 1000
+        else:
+            _seed(variant, engine, _soup(size, size, percent, 1))
+        engine.process() # premier appel hors mesure (pool, caches)
+        process = _measure(engine.process)
+        result['process_ms'] = process * 1000
+        result['generations_per_second'] = 1 / process
+        result['cells_per_second'] = size * size / process
+        if variant.live_cells:
+            result['live_cells_ms'] = _measure(lambda: engine.live_cells) * 1000
+        return result
+    finally:
+        variant.close(engine)
+
+
+def compare(report, baseline, tolerance):
+    # variantes plus lentes que dans le rapport de référence (au-delà de la tolérance)
+    previous = {(r['variant'], r['width'], r['height'], r['percent']): r['process_ms'] for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        key = (result['variant'], result['width'], result['height'], result['percent'])
+        if key in previous and result['process_ms'] > previous[key] * (1 + tolerance):
+            regressions.append(f'{key[0]} {key[1]} x {key[2]} ({key[3]}): '
+                               f'{previous[key]:.2f} ms -> {result["process_ms"]:.2f} ms')
+    return regressions
+
+
+# quelques tests simples
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the Game of Life engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES)
+    parser.add_argument('--variants', nargs='+', help='names of the variants to run (default: all)')
+    parser.add_argument('--output', default='gol_benchmark.json')
+    parser.add_argument('--baseline', help='previous report to compare process() times against')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    arguments = parser.parse_args()
+
+    variants = _variants()
+    oracle = variants[0]
+    if arguments.variants:
+        unknown = set(arguments.variants) - {variant.name for variant in variants}
+        if unknown:
+            parser.error(f'unknown variants: {", ".join(sorted(unknown))}')
+        variants = tuple(variant for variant in variants if variant.name in arguments.variants)
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'correctness': check(variants, oracle),
+        'results': [],
+        'skipped': [],
+    }
+    for name, result in report['correctness'].items():
+        print(f'{name:<20} {"ok" if result is True else result}')
+
+    for variant in variants:
+        for size in arguments.sizes:
+            if size > variant.max_size:
+                report['skipped'].append({'variant': variant.name, 'width': size, 'height': size})
+                continue
+            for percent in arguments.densities:
+                result = bench(variant, size, percent)
+                report['results'].append(result)
+                print(f'{variant.name:<20} {size:>5} x {size:<5} ({percent}) : '
+                      f'{result["process_ms"]:10.3f} ms / génération, '
+                      f'{result["cells_per_second"] / 1e6:10.1f} Mcellules/s')
+
+    with open(arguments.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Rapport : {arguments.output}')
+
+    failed = [name for name, result in report['correctness'].items() if result is not True]
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare(report, json.load(file), arguments.tolerance)
+        for regression in regressions:
+            print(f'Régression : {regression}')
+        failed.extend(regressions)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
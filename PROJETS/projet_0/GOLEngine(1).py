@@ -1,24 +1,22 @@
-import random
 from copy import deepcopy
+import numpy as np
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import reseed, run_generations, validate_size
 
 class GOLEngine:
-    def __init__(self, width, height):
+    def __init__(self, width, height, rule=CONWAY):
         self.__width = None
         self.__height = None
         self.__grid = None 
         self.__temp = None
         self.__iterations = 0 # compteur d'itérations
+        self.__rng = np.random.default_rng() # générateur de randomize()
         
-        # Concept de table de recherche (LUT : Look-Up Table)
-        # Indique si une cellule est morte ou vivante directement
-        # à partir de l'index. À l'index i se trouve le nombre de 
-        # voisins vivants (Nvoisins) : 
-        #    Nvoisins -----> 0  1  2  3  4  5  6  7  8
-        #                    |  |  |  |  |  |  |  |  | 
-        #                    v  v  v  v  v  v  v  v  v  
-        self.__alive_rule = (0, 0, 1, 1, 0, 0, 0, 0, 0)
-        self.__dead_rule  = (0, 0, 0, 1, 0, 0, 0, 0, 0)
-        self.__rules = (self.__dead_rule, self.__alive_rule)
+        # LUT des règles, compilées à partir de la rulestring (voir GOLRule)
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.rule = rule
         
         self.resize(width, height)
 
@@ -37,6 +35,15 @@ class GOLEngine:
     @height.setter
     def height(self, value):
         self.resize(self.__width, value)
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        self.__dead_rule, self.__alive_rule = parse_rule(value)
+        self.__rules = (self.__dead_rule, self.__alive_rule)
           
     def get_cell(self, x, y):
         return self.__grid[x][y]
@@ -47,18 +54,12 @@ class GOLEngine:
     #def clamp(value, minimum, maximum):
         #return max(minimum, min(value, maximum))
     
-    def __validate_size(self, size):
-        if not isinstance(size, int):
-            raise TypeError('size must be an int')
-        if not(3 <= size <= 2000):
-            raise ValueError('size must be between 3 and 2000')
-    
     def resize(self, width, height):
         # l'importance de cette fonction justifie ces étapes de validation
         # => mettre l'importance sur l'interface de programmation
         # => on veut indiquer le plus précocement possible les problèmes potentiels
-        self.__validate_size(width)
-        self.__validate_size(height)
+        validate_size(width)
+        validate_size(height)
         
         self.__width = width
         self.__height = height
@@ -74,13 +75,41 @@ class GOLEngine:
                 #self.__grid[x].append(0)
                 #self.__temp[x].append(0)
     
-    def randomize(self, percent=0.5):
-        for y in range(self.__height):
-             for x in range(self.__width):
-                 if x != 0 and x != self.__width - 1 and y != 0 and y != self.__height - 1:
-                     self.__grid[x][y] = 1 if random.random() > percent else 0
+    def randomize(self, percent=0.5, seed=None):
+        self.__rng = reseed(self.__rng, seed)
+        # tout l'intérieur tiré d'un coup, puis une affectation de tranche par
+        # colonne (la bordure reste morte)
+        cells = self.__rng.random((self.__width - 2, self.__height - 2), dtype=np.float32) > percent
+        for x, column in enumerate(cells.astype(int).tolist(), 1):
+            self.__grid[x][1:-1] = column
+
+    def stamp(self, pattern, x, y):
+        # copie le motif (rangées de 0 / 1) avec son coin haut-gauche en (x, y)
+        rows = [[1 if value else 0 for value in row] for row in pattern]
+        width = len(rows[0]) if rows else 0
+        if any(len(row) != width for row in rows):
+            raise ValueError('pattern rows must all have the same length')
+        self.__validate_rect(x, y, width, len(rows))
+        # la grille est rangée par colonnes : une tranche par colonne du motif
+        for dx, column in enumerate(zip(*rows)):
+            self.__grid[x + dx][y:y + len(rows)] = column
+
+    def fill_rect(self, x, y, width, height, value):
+        # toutes les cellules du rectangle à value
+        self.__validate_rect(x, y, width, height)
+        value = 1 if value else 0
+        for column in self.__grid[x:x + width]:
+            column[y:y + height] = [value] * height
+
+    def __validate_rect(self, x, y, width, height):
+        for value in (x, y, width, height):
+            if not isinstance(value, int):
+                raise TypeError('rectangle coordinates and size must be ints')
+        if x < 0 or y < 0 or width < 0 or height < 0 or x + width > self.__width or y + height > self.__height:
+            raise ValueError(f'rectangle ({x}, {y}, {width} x {height}) does not fit in the grid '
+                             f'({self.__width} x {self.__height})')
                 
-    def process(self):
+    def __step(self):
         for x in range(1, self.__width-1):
             for y in range(1, self.__height-1):
                 neighbours = sum(self.__grid[x-1][y-1:y+2]) \
@@ -106,7 +135,10 @@ class GOLEngine:
         #        self.__grid[x][y] = self.__temp[x][y]
         self.__grid, self.__temp = self.__temp, self.__grid
 
-        self.__iterations += 1 # incrémentation du compteur
+    def process(self, n=1):
+        run_generations(self.__step, n)
+
+        self.__iterations += n # incrémentation du compteur
 
     @property
     def live_cells(self): # renvoie le nb de cels vivantes
@@ -0,0 +1,284 @@
+import time
+import numpy as np
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import reseed, run_generations, validate_size
+from GOLPattern import SNAPSHOT_FORMAT, load_pattern, save_pattern, create_snapshot, open_snapshot, pack_rows, unpack_rows
+
+# Moteur de jeu de la vie compacté en bits (64 cellules par mot uint64).
+#
+# Même interface que GOLEngine / GOLEngineNumpy.
+#
+# Optimisations :
+# - 1 bit par cellule : 8x moins de mémoire et de bande passante qu'un uint8
+# - chaque génération est calculée 64 cellules à la fois par mot, avec des
+#   additionneurs complets (full adders) bit à bit sur les rangées décalées
+# - les LUT __alive_rule / __dead_rule sont compilées en expressions booléennes
+# - live_cells est un simple popcount
+# - les snapshots (.gol, voir GOLPattern) ont la même disposition que la
+#   grille : save() et load() copient les mots mappés en mémoire tels quels
+#
+# Le bit i du mot j d'une rangée correspond à la cellule x = 64 * j + i.
+
+WORD_BITS = 64
+WORD_SHIFT = 6 # x >> 6 == x // 64
+BAND_WORDS = 1 << 14 # taille d'une bande de calcul (en mots), pour rester en cache
+MAX_SIZE = 65536 # 1 bit par cellule : grilles bien plus grandes que GOLEngine
+
+_ONE = np.uint64(1)
+_LAST_BIT = np.uint64(WORD_BITS - 1)
+_ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# table de popcount par octet si np.bitwise_count n'est pas disponible (NumPy < 2.0)
+_POPCOUNT_LUT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum(dtype=np.uint64))
+    return int(_POPCOUNT_LUT[words.view(np.uint8)].sum(dtype=np.uint64))
+
+
+def _west(words):
+    # décale d'une cellule vers x + 1 : la cellule x reçoit l'état de x - 1
+    shifted = words << _ONE
+    shifted[:, 1:] |= words[:, :-1] >> _LAST_BIT
+    return shifted
+
+
+def _east(words):
+    # décale d'une cellule vers x - 1 : la cellule x reçoit l'état de x + 1
+    shifted = words >> _ONE
+    shifted[:, :-1] |= words[:, 1:] << _LAST_BIT
+    return shifted
+
+
+def _full_adder(a, b, c):
+    partial = a ^ b
+    return partial ^ c, (a & b) | (partial & c)
+
+
+class GOLEngineBitPacked:
+    def __init__(self, width, height, rule=CONWAY):
+        self.__width = None
+        self.__height = None
+        self.__words = None # nombre de mots uint64 par rangée
+        self.__grid = None
+        self.__temp = None
+        self.__interior = None # masque des bits calculés (hors bordure)
+        self.__rng = np.random.default_rng() # générateur de randomize()
+        self.__iterations = 0 # compteur d'itérations
+
+        # LUT des règles (voir GOLRule) et leurs nombres de voisins B / S, pour les
+        # expressions booléennes de __step
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.__birth = None
+        self.__survival = None
+        self.rule = rule
+
+        self.resize(width, height)
+
+    @property
+    def width(self):
+        return self.__width
+
+    @width.setter
+    def width(self, value):
+        self.resize(value, self.__height)
+
+    @property
+    def height(self):
+        return self.__height
+
+    @height.setter
+    def height(self, value):
+        self.resize(self.__width, value)
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        self.__dead_rule, self.__alive_rule = parse_rule(value)
+        self.__rules = (self.__dead_rule, self.__alive_rule)
+        # compilation des LUT en expressions booléennes : pour chaque état,
+        # les nombres de voisins qui donnent une cellule vivante ; chaque
+        # nombre n devient un ET des 4 bits du compteur (bit ou ~bit)
+        self.__birth = tuple(n for n, value in enumerate(self.__dead_rule) if value)
+        self.__survival = tuple(n for n, value in enumerate(self.__alive_rule) if value)
+
+    def get_cell(self, x, y):
+        return int(self.__grid[y, x >> WORD_SHIFT] >> np.uint64(x & (WORD_BITS - 1))) & 1
+
+    def set_cell(self, x, y, value):
+        bit = _ONE << np.uint64(x & (WORD_BITS - 1))
+        if value:
+            self.__grid[y, x >> WORD_SHIFT] |= bit
+        else:
+            self.__grid[y, x >> WORD_SHIFT] &= ~bit
+
+    def resize(self, width, height):
+        validate_size(width, MAX_SIZE)
+        validate_size(height, MAX_SIZE)
+
+        self.__width = width
+        self.__height = height
+        self.__words = (width + WORD_BITS - 1) // WORD_BITS
+        self.__grid = np.zeros((height, self.__words), dtype=np.uint64)
+        self.__temp = np.zeros((height, self.__words), dtype=np.uint64)
+
+        # bits 1 à width - 2 : la bordure gauche/droite et le remplissage
+        # du dernier mot ne sont jamais calculés
+        interior = np.zeros(self.__words * WORD_BITS, dtype=bool)
+        interior[1:width - 1] = True
+        self.__interior = np.packbits(interior, bitorder='little').view('<u8').astype(np.uint64)
+
+    def randomize(self, percent=0.5, seed=None):
+        self.__rng = reseed(self.__rng, seed)
+        # par blocs de rangées pour ne pas matérialiser toute la grille en booléens
+        rows_per_block = max(1, (1 << 24) // (self.__words * WORD_BITS))
+        for top in range(1, self.__height - 1, rows_per_block):
+            bottom = min(top + rows_per_block, self.__height - 1)
+            cells = np.zeros((bottom - top, self.__words * WORD_BITS), dtype=bool)
+            cells[:, 1:self.__width - 1] = self.__rng.random((bottom - top, self.__width - 2), dtype=np.float32) > percent
+            self.__grid[top:bottom] = np.packbits(cells, axis=1, bitorder='little').view('<u8')
+
+    def load(self, path):
+        # .gol : snapshot (taille, règle et itérations restaurées)
+        # .rle / .cells : motif centré dans une grille vide (règle du RLE s'il y en a une)
+        if str(path).lower().endswith(SNAPSHOT_FORMAT):
+            words, width, height, rule, boundary, iterations = open_snapshot(path)
+            if boundary != 'dead':
+                raise ValueError(f'boundary {boundary!r} is not supported (dead border only)')
+            self.resize(width, height)
+            self.rule = rule
+            np.copyto(self.__grid, words)
+            self.__iterations = iterations
+        else:
+            cells, rule = load_pattern(path)
+            height, width = cells.shape
+            if width > self.__width - 2 or height > self.__height - 2:
+                raise ValueError(f'pattern ({width} x {height}) does not fit in the grid '
+                                 f'({self.__width} x {self.__height}, border excluded)')
+            if rule:
+                self.rule = rule
+            top = (self.__height - height) // 2
+            left = (self.__width - width) // 2
+            rows = np.zeros((height, self.__words * WORD_BITS), dtype=np.uint8)
+            rows[:, left:left + width] = cells
+            self.__grid[:] = 0
+            pack_rows(rows, self.__grid[top:top + height])
+
+    def save(self, path):
+        # .gol : snapshot de toute la grille ; .rle / .cells : cellules vivantes seulement
+        if str(path).lower().endswith(SNAPSHOT_FORMAT):
+            words = create_snapshot(path, self.__width, self.__height, self.rule, 'dead', self.__iterations)
+            np.copyto(words, self.__grid)
+            words.flush()
+        else:
+            # seules les rangées contenant des cellules vivantes sont décompactées
+            rows = np.flatnonzero(self.__grid.any(axis=1))
+            top, bottom = (rows[0], rows[-1] + 1) if rows.size else (0, 0)
+            cells = np.zeros((bottom - top, self.__width), dtype=np.uint8)
+            unpack_rows(self.__grid[top:bottom], cells)
+            save_pattern(path, cells, self.rule)
+
+    def __matches(self, count, n):
+        # expression booléenne vraie pour les cellules ayant exactement n voisins
+        term = None
+        for bit, plane in enumerate(count):
+            factor = plane if (n >> bit) & 1 else ~plane
+            term = factor if term is None else term & factor
+        return term
+
+    def __any_of(self, count, values):
+        result = None
+        for n in values:
+            term = self.__matches(count, n)
+            result = term if result is None else result | term
+        return result
+
+    def __step_rows(self, top, bottom):
+        # calcule les rangées [top, bottom[ de la génération suivante dans __temp
+        grid = self.__grid
+        up, middle, down = grid[top - 1:bottom - 1], grid[top:bottom], grid[top + 1:bottom + 1]
+
+        # 8 plans de bits voisins, additionnés avec des full adders :
+        # (a, b, c) + (d, e, f) + (g, h) -> compteur de 4 bits (count0..count3)
+        sum_1, carry_1 = _full_adder(_west(up), up, _east(up))
+        sum_2, carry_2 = _full_adder(_west(down), down, _east(down))
+        west, east = _west(middle), _east(middle)
+        sum_3, carry_3 = west ^ east, west & east
+        count0, carry_4 = _full_adder(sum_1, sum_2, sum_3)
+        sum_5, carry_5 = _full_adder(carry_1, carry_2, carry_3)
+        count1, carry_6 = sum_5 ^ carry_4, sum_5 & carry_4
+        count2, count3 = carry_5 ^ carry_6, carry_5 & carry_6
+        count = (count0, count1, count2, count3)
+
+        zero = np.zeros_like(middle)
+        born = self.__any_of(count, self.__birth)
+        survive = self.__any_of(count, self.__survival)
+        born = ~middle & born if born is not None else zero
+        survive = middle & survive if survive is not None else zero
+        result = born | survive
+
+        # seules les cellules intérieures sont mises à jour, comme dans GOLEngine
+        interior = self.__interior
+        temp = self.__temp[top:bottom]
+        temp &= interior ^ _ALL_ONES
+        temp |= result & interior
+
+    def __step(self):
+        # par bandes de rangées pour que les plans temporaires restent en cache
+        rows_per_band = max(1, BAND_WORDS // self.__words)
+        for top in range(1, self.__height - 1, rows_per_band):
+            self.__step_rows(top, min(top + rows_per_band, self.__height - 1))
+
+        self.__grid, self.__temp = self.__temp, self.__grid
+
+    def process(self, n=1):
+        run_generations(self.__step, n)
+
+        self.__iterations += n # incrémentation du compteur
+
+    @property
+    def live_cells(self): # renvoie le nb de cels vivantes (popcount)
+        return _popcount(self.__grid)
+
+    @property
+    def dead_cells(self): # renvoie le nb de cels mortes
+        return self.width * self.height - self.live_cells
+
+    @property
+    def iterations(self): # renvoie le nb d'itérations effectuées
+        return self.__iterations
+
+    def print(self):
+        for row in np.unpackbits(self.__grid.view(np.uint8), axis=1, bitorder='little')[:, :self.__width]:
+            print(''.join(str(cell) for cell in row))
+        print()
+
+
+
+# quelques tests simples
+def main():
+    gol = GOLEngineBitPacked(12, 8)
+    gol.randomize()
+    gol.print()
+    gol.process()
+    gol.print()
+
+    gol.resize(20000, 20000)
+    gol.randomize()
+    start = time.perf_counter()
+    for _ in range(5):
+        gol.process()
+    elapsed = (time.perf_counter() - start) / 5
+    print(f'20000 x 20000 : {elapsed * 1000:.1f} ms / génération, '
+          f'{20000 * 20000 / elapsed / 1e9:.2f} Gcellules/s')
+    print(f'Cellules vivantes : {gol.live_cells}')
+
+if __name__ == '__main__':
+    main()
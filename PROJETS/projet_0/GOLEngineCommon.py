@@ -0,0 +1,41 @@
+import numpy as np
+
+# Validation et outils communs aux moteurs (GOLEngine, GOLEngineNumpy,
+# GOLEngineBitPacked, GOLEngineParallel, GOLEngineSparse, GOLHashLife).
+#
+# Chaque moteur ne garde que sa façon de calculer une génération (__step) ;
+# la validation des arguments et la boucle de process() sont ici, pour que
+# tous les moteurs lèvent les mêmes erreurs.
+
+MAX_SIZE = 2000 # taille maximale par défaut d'une grille bornée
+
+
+def validate_size(size, maximum=MAX_SIZE):
+    # largeur ou hauteur d'une grille bornée
+    if not isinstance(size, int):
+        raise TypeError('size must be an int')
+    if not(3 <= size <= maximum):
+        raise ValueError(f'size must be between 3 and {maximum}')
+
+
+def validate_generations(n):
+    # nombre de générations demandé à process()
+    if not isinstance(n, int):
+        raise TypeError('n must be an int')
+    if n < 1:
+        raise ValueError('n must be at least 1')
+
+
+def run_generations(step, n):
+    # avance de n générations d'un coup : le moteur met ensuite son compteur
+    # d'itérations à jour une seule fois
+    validate_generations(n)
+    for _ in range(n):
+        step()
+
+
+def reseed(rng, seed):
+    # générateur de randomize() : une nouvelle graine donne des tirages
+    # reproductibles, sans graine le générateur courant continue sa suite
+    return rng if seed is None else np.random.default_rng(seed)
+
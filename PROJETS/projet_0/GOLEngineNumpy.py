@@ -0,0 +1,542 @@
+import time
+from collections import deque
+import numpy as np
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import reseed, run_generations, validate_size
+from GOLPattern import SNAPSHOT_FORMAT, load_pattern, save_pattern, create_snapshot, open_snapshot, pack_rows, unpack_rows
+
+# Moteur de jeu de la vie vectorisé avec NumPy.
+#
+# Même interface que GOLEngine (get_cell, set_cell, resize, randomize,
+# live_cells, iterations) pour être utilisé tel quel par GOLApp.
+#
+# Optimisations :
+# - la grille est un ndarray contigu de uint8 (1 octet par cellule)
+# - le nombre de voisins de toutes les cellules est calculé en une seule
+#   passe vectorisée (somme des 8 sous-matrices décalées)
+# - la LUT des règles est appliquée par indexation avancée (fancy indexing)
+# - seules les tuiles actives (modifiées à la génération précédente, ou
+#   voisines d'une tuile modifiée) sont recalculées : le coût d'une
+#   génération suit l'activité plutôt que la surface
+# - mode de bordure (dead, wrap, mirror) géré directement dans la mise à
+#   jour : les 4 bords sont recalculés comme des lignes (coût en
+#   largeur + hauteur), sans copier la grille dans un tableau élargi
+# - la population est tenue à jour pendant process(), set_cell() et
+#   randomize() : live_cells et dead_cells sont lus en O(1), et l'historique
+#   de population est conservé dans un tableau uint32
+# - les tuiles modifiées sont accumulées entre deux affichages :
+#   pop_changed_regions() donne les rectangles à redessiner
+# - randomize() tire toute la grille d'un coup avec un numpy.random.Generator
+#   (graine optionnelle pour rejouer une partie) ; stamp() et fill_rect()
+#   écrivent un rectangle d'un coup, sans passer par set_cell()
+# - load() / save() lisent et écrivent les motifs RLE / plaintext et les
+#   snapshots bit à bit mappés en mémoire (voir GOLPattern)
+# - détection des cycles : chaque génération a un hash, XOR des mots d'une
+#   copie compactée de la grille (32 cellules par mot) mélangés avec une
+#   clé par position ; pendant le pas, seuls les mots des tuiles recalculées
+#   sont recompactés et retirés / ajoutés au hash. Une table bornée des
+#   hash récents donne la période (1 pour une nature morte)
+#
+# La grille est stockée en (hauteur, largeur) pour que chaque rangée de
+# l'image soit contiguë en mémoire ; get_cell(x, y) lit donc grid[y, x].
+# La propriété cells expose ce tampon tel quel (sans copie) pour l'affichage.
+
+TILE_SIZE = 32 # côté d'une tuile (en cellules) pour le suivi des zones actives
+WORD_CELLS = 32 # cellules par mot de la copie compactée (TILE_SIZE en est un multiple)
+FULL_PASS_RATIO = 0.5 # au-delà de cette proportion de tuiles actives, on calcule toute la grille
+
+# modes de bordure :
+# - dead   : la rangée extérieure n'évolue pas (comportement de GOLEngine)
+# - wrap   : tore, les bords opposés sont voisins
+# - mirror : la cellule hors grille a l'état de la cellule du bord (miroir)
+BOUNDARY_MODES = ('dead', 'wrap', 'mirror')
+
+HISTORY_CAPACITY = 1024 # capacité initiale de l'historique (doublée au besoin)
+
+CYCLE_WINDOW = 256 # nb de générations récentes conservées pour la détection des cycles (période max)
+HASH_SEED = 0x5EED # graine des clés de hash (mêmes clés d'une exécution à l'autre)
+_HASH_MULTIPLIER = np.uint64(0xBF58476D1CE4E5B9)
+_HASH_SHIFTS = (np.uint64(31), np.uint64(29))
+
+
+def _pack_words(cells):
+    # rangées de cellules -> mots uint32 (bit i du mot j : cellule 32 * j + i)
+    packed = np.packbits(cells, axis=1, bitorder='little')
+    padding = -packed.shape[1] % 4
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return packed.view('<u4')
+
+
+def _words_hash(words, keys):
+    # XOR des mots mélangés (finaliseur splitmix64) avec la clé de leur position
+    mixed = keys + words
+    mixed ^= mixed >> _HASH_SHIFTS[0]
+    mixed *= _HASH_MULTIPLIER
+    mixed ^= mixed >> _HASH_SHIFTS[1]
+    return int(np.bitwise_xor.reduce(mixed, axis=None))
+
+
+def _tile_runs(row):
+    # (première, dernière + 1) de chaque suite de tuiles à True dans une rangée
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False]))))
+    return zip(edges[::2].tolist(), edges[1::2].tolist())
+
+
+class GOLEngineNumpy:
+    def __init__(self, width, height, rule=CONWAY, boundary='dead'):
+        self.__width = None
+        self.__height = None
+        self.__grid = None
+        self.__temp = None
+        self.__neighbours = None # tampon réutilisé pour le nombre de voisins
+        self.__changed = None # tuiles modifiées à la dernière génération
+        self.__active_tiles = 0 # nb de tuiles recalculées à la dernière génération
+        self.__dirty = None # tuiles modifiées depuis le dernier pop_changed_regions()
+        self.__boundary = None
+        self.__live = 0 # nb de cellules vivantes
+        self.__history = None # population après chaque génération depuis le dernier resize
+        self.__history_size = 0
+        self.__words = None # copie compactée de la grille (pour le hash)
+        self.__hash_keys = None # clé de hash de chaque mot
+        self.__hash = 0 # hash de la génération courante
+        self.__seen = {} # hash récent -> index de la génération (dans l'historique)
+        self.__recent = deque() # (hash, index) des CYCLE_WINDOW dernières générations
+        self.__period = None # période du cycle détecté, None si aucun
+        self.__rng = np.random.default_rng() # générateur de randomize()
+        self.__iterations = 0 # compteur d'itérations
+
+        # LUT des règles en ndarray, pour l'indexation avancée de __step (voir GOLRule)
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.rule = rule
+        self.boundary = boundary
+
+        self.resize(width, height)
+
+    @property
+    def width(self):
+        return self.__width
+
+    @width.setter
+    def width(self, value):
+        self.resize(value, self.__height)
+
+    @property
+    def height(self):
+        return self.__height
+
+    @height.setter
+    def height(self, value):
+        self.resize(self.__width, value)
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        self.__dead_rule, self.__alive_rule = parse_rule(value)
+        self.__rules = np.array((self.__dead_rule, self.__alive_rule), dtype=np.uint8)
+        # l'état stable des tuiles (et les cycles) ne valent plus avec une nouvelle règle
+        if self.__changed is not None:
+            self.__changed[:] = True
+            self.__reset_cycles()
+
+    @property
+    def boundary(self): # mode de bordure (voir BOUNDARY_MODES)
+        return self.__boundary
+
+    @boundary.setter
+    def boundary(self, value):
+        if value not in BOUNDARY_MODES:
+            raise ValueError(f'boundary must be one of {BOUNDARY_MODES}')
+        self.__boundary = value
+        if self.__changed is not None:
+            self.__changed[:] = True
+            self.__reset_cycles()
+
+    @property
+    def cells(self): # grille courante (hauteur, largeur) en uint8, vue en lecture seule sans copie
+        cells = self.__grid[:]
+        cells.flags.writeable = False
+        return cells
+
+    def get_cell(self, x, y):
+        return int(self.__grid[y, x])
+
+    def set_cell(self, x, y, value):
+        value = 1 if value else 0
+        changed = value != self.__grid[y, x]
+        self.__live += value - int(self.__grid[y, x])
+        self.__grid[y, x] = value
+        if changed:
+            word = x // WORD_CELLS
+            self.__update_words(y, y + 1, word, word + 1)
+            self.__reset_cycles()
+        self.__changed[y // TILE_SIZE, x // TILE_SIZE] = True
+        self.__dirty[y // TILE_SIZE, x // TILE_SIZE] = True
+        self.__history[self.__history_size - 1] = self.__live
+
+    def resize(self, width, height):
+        validate_size(width)
+        validate_size(height)
+
+        self.__width = width
+        self.__height = height
+        self.__grid = np.zeros((height, width), dtype=np.uint8)
+        self.__temp = np.zeros((height, width), dtype=np.uint8)
+        self.__neighbours = np.empty((height - 2, width - 2), dtype=np.uint8)
+        self.__changed = np.ones(((height + TILE_SIZE - 1) // TILE_SIZE,
+                                  (width + TILE_SIZE - 1) // TILE_SIZE), dtype=bool)
+        self.__dirty = self.__changed.copy()
+        self.__live = 0
+        self.__history = np.zeros(HISTORY_CAPACITY, dtype=np.uint32)
+        self.__history_size = 1 # population de départ
+        words = (width + WORD_CELLS - 1) // WORD_CELLS
+        self.__words = np.zeros((height, words), dtype=np.uint32)
+        self.__hash_keys = np.random.default_rng(HASH_SEED).integers(0, 1 << 64, (height, words), dtype=np.uint64)
+        self.__hash = _words_hash(self.__words, self.__hash_keys)
+        self.__reset_cycles()
+
+    def randomize(self, percent=0.5, seed=None):
+        self.__rng = reseed(self.__rng, seed)
+        if self.__boundary == 'dead':
+            # la bordure reste morte, comme dans GOLEngine
+            self.__grid[1:-1, 1:-1] = self.__rng.random((self.__height - 2, self.__width - 2), dtype=np.float32) > percent
+        else:
+            self.__grid[:] = self.__rng.random((self.__height, self.__width), dtype=np.float32) > percent
+        self.__grid_replaced()
+
+    def stamp(self, pattern, x, y):
+        # copie le motif (rangées de 0 / 1) avec son coin haut-gauche en (x, y)
+        pattern = np.asarray(pattern)
+        if pattern.ndim != 2:
+            raise ValueError('pattern must be a 2D array of rows')
+        height, width = pattern.shape
+        self.__write_rect(x, y, width, height, pattern != 0)
+
+    def fill_rect(self, x, y, width, height, value):
+        # toutes les cellules du rectangle à value
+        self.__write_rect(x, y, width, height, 1 if value else 0)
+
+    def __write_rect(self, x, y, width, height, values):
+        for value in (x, y, width, height):
+            if not isinstance(value, (int, np.integer)):
+                raise TypeError('rectangle coordinates and size must be ints')
+        if x < 0 or y < 0 or width < 0 or height < 0 or x + width > self.__width or y + height > self.__height:
+            raise ValueError(f'rectangle ({x}, {y}, {width} x {height}) does not fit in the grid '
+                             f'({self.__width} x {self.__height})')
+        if width == 0 or height == 0:
+            return
+
+        region = self.__grid[y:y + height, x:x + width]
+        before = int(np.count_nonzero(region))
+        region[:] = values
+        self.__live += int(np.count_nonzero(region)) - before
+        self.__history[self.__history_size - 1] = self.__live
+
+        # tuiles touchées : à recalculer et à redessiner ; mots compactés (hash) à jour
+        tiles_y = slice(y // TILE_SIZE, (y + height - 1) // TILE_SIZE + 1)
+        tiles_x = slice(x // TILE_SIZE, (x + width - 1) // TILE_SIZE + 1)
+        self.__changed[tiles_y, tiles_x] = True
+        self.__dirty[tiles_y, tiles_x] = True
+        self.__update_words(y, y + height, x // WORD_CELLS, (x + width - 1) // WORD_CELLS + 1)
+        self.__reset_cycles()
+
+    def __grid_replaced(self):
+        # toute la grille a pu changer : tuiles à recalculer et à redessiner, population recomptée
+        self.__changed[:] = True
+        self.__dirty[:] = True
+        self.__live = int(np.count_nonzero(self.__grid))
+        self.__history[self.__history_size - 1] = self.__live
+        self.__words = _pack_words(self.__grid)
+        self.__hash = _words_hash(self.__words, self.__hash_keys)
+        self.__reset_cycles()
+
+    def __update_words(self, top, bottom, first, last):
+        # recompacte les mots [first, last[ des rangées [top, bottom[ et met le hash à jour
+        old = self.__words[top:bottom, first:last]
+        new = _pack_words(self.__grid[top:bottom, first * WORD_CELLS:last * WORD_CELLS])
+        # un seul mélange pour retirer les anciens mots et ajouter les nouveaux (mêmes clés)
+        keys = self.__hash_keys[top:bottom, first:last]
+        self.__hash ^= _words_hash(np.stack((old, new), axis=1), keys[:, np.newaxis])
+        old[:] = new
+
+    def __reset_cycles(self):
+        # la grille a été modifiée de l'extérieur : on repart de la génération courante
+        self.__seen = {self.__hash: self.__history_size - 1}
+        self.__recent = deque([(self.__hash, self.__history_size - 1)])
+        self.__period = None
+
+    def load(self, path):
+        # .gol : snapshot (taille, règle, bordure et itérations restaurées)
+        # .rle / .cells : motif centré dans une grille vide (règle du RLE s'il y en a une)
+        if str(path).lower().endswith(SNAPSHOT_FORMAT):
+            words, width, height, rule, boundary, iterations = open_snapshot(path)
+            self.resize(width, height)
+            self.rule = rule
+            self.boundary = boundary
+            unpack_rows(words, self.__grid)
+            self.__iterations = iterations
+            self.__grid_replaced()
+        else:
+            cells, rule = load_pattern(path)
+            height, width = cells.shape
+            if width > self.__width - 2 or height > self.__height - 2:
+                raise ValueError(f'pattern ({width} x {height}) does not fit in the grid '
+                                 f'({self.__width} x {self.__height}, border excluded)')
+            if rule:
+                self.rule = rule
+            self.fill_rect(0, 0, self.__width, self.__height, 0)
+            self.stamp(cells, (self.__width - width) // 2, (self.__height - height) // 2)
+
+    def save(self, path):
+        # .gol : snapshot de toute la grille ; .rle / .cells : cellules vivantes seulement
+        if str(path).lower().endswith(SNAPSHOT_FORMAT):
+            words = create_snapshot(path, self.__width, self.__height, self.rule, self.__boundary, self.__iterations)
+            pack_rows(self.__grid, words)
+            words.flush()
+        else:
+            save_pattern(path, self.__grid, self.rule)
+
+    def __step_region(self, top, bottom, left, right):
+        # calcule les cellules [top, bottom[ x [left, right[ (intérieures) dans __temp
+        grid = self.__grid
+        neighbours = self.__neighbours[:bottom - top, :right - left]
+
+        # somme des 8 voisins pour toutes les cellules de la région d'un coup
+        np.add(grid[top - 1:bottom - 1, left - 1:right - 1], grid[top - 1:bottom - 1, left:right], out=neighbours)
+        neighbours += grid[top - 1:bottom - 1, left + 1:right + 1]
+        neighbours += grid[top:bottom, left - 1:right - 1]
+        neighbours += grid[top:bottom, left + 1:right + 1]
+        neighbours += grid[top + 1:bottom + 1, left - 1:right - 1]
+        neighbours += grid[top + 1:bottom + 1, left:right]
+        neighbours += grid[top + 1:bottom + 1, left + 1:right + 1]
+
+        # application de la LUT : __rules[état][Nvoisins] pour chaque cellule
+        self.__temp[top:bottom, left:right] = self.__rules[grid[top:bottom, left:right], neighbours]
+
+    def __pad_line(self, line):
+        # une cellule de plus à chaque bout de la ligne, selon le mode de bordure
+        if self.__boundary == 'wrap':
+            return np.concatenate((line[-1:], line, line[:1]))
+        return np.concatenate((line[:1], line, line[-1:]))
+
+    def __line_neighbours(self, before, line, after):
+        # nombre de voisins de chaque cellule de line, entre les lignes before et after
+        before, line, after = self.__pad_line(before), self.__pad_line(line), self.__pad_line(after)
+        return (before[:-2] + before[1:-1] + before[2:] + line[:-2] + line[2:]
+                + after[:-2] + after[1:-1] + after[2:])
+
+    def __keep_edges(self):
+        # mode dead : les 4 bords ne sont jamais calculés, ils restent tels quels
+        # d'une génération à l'autre (sinon __temp garderait les bords d'une
+        # génération antérieure, p. ex. après un passage de wrap à dead)
+        grid, temp = self.__grid, self.__temp
+        temp[0] = grid[0]
+        temp[-1] = grid[-1]
+        temp[:, 0] = grid[:, 0]
+        temp[:, -1] = grid[:, -1]
+
+    def __step_edges(self):
+        # calcule les 4 bords dans __temp (modes wrap et mirror)
+        grid, temp, rules = self.__grid, self.__temp, self.__rules
+        if self.__boundary == 'wrap':
+            above, below, left, right = grid[-1], grid[0], grid[:, -1], grid[:, 0]
+        else:
+            above, below, left, right = grid[0], grid[-1], grid[:, 0], grid[:, -1]
+
+        temp[0] = rules[grid[0], self.__line_neighbours(above, grid[0], grid[1])]
+        temp[-1] = rules[grid[-1], self.__line_neighbours(grid[-2], grid[-1], below)]
+        temp[:, 0] = rules[grid[:, 0], self.__line_neighbours(left, grid[:, 0], grid[:, 1])]
+        temp[:, -1] = rules[grid[:, -1], self.__line_neighbours(grid[:, -2], grid[:, -1], right)]
+
+    def __active(self):
+        # une tuile est active si elle ou l'une de ses 8 voisines a changé
+        changed = self.__changed
+        if self.__boundary == 'wrap':
+            # sur un tore, les tuiles des bords opposés sont voisines
+            active = changed | np.roll(changed, 1, axis=0) | np.roll(changed, -1, axis=0)
+            return active | np.roll(active, 1, axis=1) | np.roll(active, -1, axis=1)
+        active = changed.copy()
+        active[1:, :] |= changed[:-1, :]
+        active[:-1, :] |= changed[1:, :]
+        vertical = active.copy()
+        active[:, 1:] |= vertical[:, :-1]
+        active[:, :-1] |= vertical[:, 1:]
+        return active
+
+    def __step(self):
+        active = self.__active()
+        self.__active_tiles = int(np.count_nonzero(active))
+        height, width = self.__height, self.__width
+
+        if self.__active_tiles > FULL_PASS_RATIO * active.size:
+            # beaucoup d'activité : une seule passe vectorisée sur toute la grille
+            self.__step_region(1, height - 1, 1, width - 1)
+            if self.__boundary != 'dead':
+                self.__step_edges()
+            else:
+                self.__keep_edges()
+            starts_y = np.arange(0, height, TILE_SIZE)
+            starts_x = np.arange(0, width, TILE_SIZE)
+            diff = self.__temp != self.__grid
+            diff = np.logical_or.reduceat(diff, starts_y, axis=0)
+            self.__changed = np.logical_or.reduceat(diff, starts_x, axis=1)
+            self.__live = int(np.count_nonzero(self.__temp))
+            self.__words = _pack_words(self.__temp)
+            self.__hash = _words_hash(self.__words, self.__hash_keys)
+            runs = ()
+        else:
+            # peu d'activité : uniquement les suites de tuiles actives, rangée par rangée
+            runs = []
+            for tile_y in np.flatnonzero(active.any(axis=1)):
+                tile_top = tile_y * TILE_SIZE
+                tile_bottom = min(tile_top + TILE_SIZE, height)
+                for first, last in _tile_runs(active[tile_y]):
+                    tile_left = first * TILE_SIZE
+                    tile_right = min(last * TILE_SIZE, width)
+                    self.__step_region(max(tile_top, 1), min(tile_bottom, height - 1),
+                                       max(tile_left, 1), min(tile_right, width - 1))
+                    runs.append((tile_y, first, last, tile_top, tile_bottom, tile_left, tile_right))
+            if self.__boundary != 'dead':
+                self.__step_edges()
+            else:
+                self.__keep_edges()
+
+            # comparaison sur toute la tuile (bordure incluse)
+            changed = np.zeros_like(active)
+            for tile_y, first, last, tile_top, tile_bottom, tile_left, tile_right in runs:
+                new = self.__temp[tile_top:tile_bottom, tile_left:tile_right]
+                old = self.__grid[tile_top:tile_bottom, tile_left:tile_right]
+                diff = (new != old).any(axis=0)
+                changed[tile_y, first:last] = np.logical_or.reduceat(diff, np.arange(0, diff.size, TILE_SIZE))
+                # les tuiles inactives sont stables : seules les suites calculées changent la population
+                self.__live += int(np.count_nonzero(new)) - int(np.count_nonzero(old))
+            self.__changed = changed
+
+        self.__grid, self.__temp = self.__temp, self.__grid
+        # peu d'activité : seuls les mots des tuiles recalculées sont recompactés pour le hash
+        words_per_tile = TILE_SIZE // WORD_CELLS
+        for tile_y, first, last, tile_top, tile_bottom, tile_left, tile_right in runs:
+            self.__update_words(tile_top, tile_bottom, first * words_per_tile, last * words_per_tile)
+        self.__dirty |= self.__changed
+        self.__record()
+
+    def __record(self):
+        # ajoute la population courante à l'historique (capacité doublée si plein)
+        if self.__history_size == self.__history.size:
+            self.__history = np.concatenate((self.__history, np.zeros_like(self.__history)))
+        self.__history[self.__history_size] = self.__live
+        self.__history_size += 1
+        self.__detect_cycle()
+
+    def __detect_cycle(self):
+        # génération déjà vue parmi les CYCLE_WINDOW dernières : cycle de période (index - index précédent)
+        index = self.__history_size - 1
+        previous = self.__seen.get(self.__hash)
+        self.__period = index - previous if previous is not None else None
+        self.__seen[self.__hash] = index
+        self.__recent.append((self.__hash, index))
+        if len(self.__recent) > CYCLE_WINDOW:
+            old_hash, old_index = self.__recent.popleft()
+            if self.__seen.get(old_hash) == old_index:
+                del self.__seen[old_hash]
+
+    def process(self, n=1):
+        run_generations(self.__step, n)
+
+        self.__iterations += n # incrémentation du compteur
+
+    def pop_changed_regions(self):
+        # rectangles (x, y, largeur, hauteur) modifiés depuis le dernier appel,
+        # une suite de tuiles par rectangle ; l'accumulateur est ensuite vidé
+        regions = []
+        for tile_y in np.flatnonzero(self.__dirty.any(axis=1)).tolist():
+            y = tile_y * TILE_SIZE
+            height = min(TILE_SIZE, self.__height - y)
+            for first, last in _tile_runs(self.__dirty[tile_y]):
+                x = first * TILE_SIZE
+                regions.append((x, y, min(last * TILE_SIZE, self.__width) - x, height))
+        self.__dirty[:] = False
+        return regions
+
+    @property
+    def active_tiles(self): # renvoie le nb de tuiles recalculées à la dernière génération
+        return self.__active_tiles
+
+    @property
+    def live_cells(self): # renvoie le nb de cels vivantes
+        return self.__live
+
+    @property
+    def dead_cells(self): # renvoie le nb de cels mortes
+        return self.width * self.height - self.live_cells
+
+    @property
+    def iterations(self): # renvoie le nb d'itérations effectuées
+        return self.__iterations
+
+    @property
+    def period(self): # période du cycle atteint (1 : nature morte), None si aucun cycle détecté
+        return self.__period
+
+    @property
+    def is_stable(self): # la grille est entrée dans un cycle (nature morte ou oscillateur)
+        return self.__period is not None
+
+    @property
+    def population_history(self): # population après chaque génération depuis le dernier resize (lecture seule)
+        history = self.__history[:self.__history_size]
+        history.flags.writeable = False
+        return history
+
+    def print(self):
+        for row in self.__grid:
+            print(''.join(str(cell) for cell in row))
+        print()
+
+
+
+# quelques tests simples
+def main():
+    gol = GOLEngineNumpy(12, 8)
+    gol.randomize()
+    gol.print()
+    gol.process()
+    gol.print()
+
+    gol.resize(2000, 2000)
+    gol.randomize()
+    start = time.perf_counter()
+    for _ in range(10):
+        gol.process()
+    elapsed = (time.perf_counter() - start) / 10
+    print(f'2000 x 2000 : {elapsed * 1000:.1f} ms / génération')
+    print(f'Cellules vivantes : {gol.live_cells}, itérations : {gol.iterations}')
+
+    # une soupe finit presque toujours en natures mortes et oscillateurs
+    gol.resize(200, 200)
+    gol.randomize()
+    while not gol.is_stable and gol.iterations < 10000:
+        gol.process()
+    print(f'Stable après {gol.iterations} itérations (période {gol.period})')
+
+    # passage de wrap à dead en cours de route : les bords restent ceux de la
+    # grille courante (comme un moteur créé en mode dead avec la même grille)
+    gol = GOLEngineNumpy(60, 40, boundary='wrap')
+    gol.randomize(seed=1)
+    gol.process(5)
+    gol.boundary = 'dead'
+    reference = GOLEngineNumpy(60, 40)
+    reference.stamp(gol.cells, 0, 0)
+    for _ in range(20):
+        gol.process()
+        reference.process()
+        assert np.array_equal(gol.cells, reference.cells)
+    print('Passage de wrap à dead : identique à un moteur en mode dead sur 20 générations')
+
+if __name__ == '__main__':
+    main()
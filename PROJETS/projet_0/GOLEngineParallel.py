@@ -0,0 +1,238 @@
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import reseed, run_generations, validate_size
+
+# Moteur de jeu de la vie parallèle (multi-coeurs).
+#
+# Même interface que GOLEngine / GOLEngineNumpy.
+#
+# La grille est découpée en bandes horizontales, chacune calculée par un
+# processus d'un pool. Les deux tampons (__grid, __temp) sont dans de la
+# mémoire partagée (multiprocessing.shared_memory) : chaque worker lit
+# directement la rangée de halo au-dessus et au-dessous de sa bande dans
+# __grid et écrit sa bande dans __temp. L'échange des halos se fait donc
+# sans copie et l'échange des tampons reste un simple swap.
+#
+# Le pool doit être libéré avec close() (ou via un bloc with).
+
+MAX_SIZE = 20000 # grilles réparties sur plusieurs coeurs : plus grandes que GOLEngine
+
+# tampons partagés déjà ouverts dans le worker : nom -> SharedMemory
+_attached = {}
+
+
+def _attach(name, shape):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+
+def _step_band(task):
+    # calcule les rangées [top, bottom[ de src vers dst (exécuté dans un worker)
+    src_name, dst_name, shape, top, bottom, rules = task
+
+    # après un resize, on ferme les tampons qui ne servent plus
+    for name in [name for name in _attached if name not in (src_name, dst_name)]:
+        _attached.pop(name).close()
+
+    _step_rows(_attach(src_name, shape), _attach(dst_name, shape), top, bottom, rules)
+
+
+def _step_rows(grid, temp, top, bottom, rules):
+    # calcule les rangées [top, bottom[ de grid vers temp
+    rules = np.asarray(rules, dtype=np.uint8)
+    neighbours = grid[top - 1:bottom - 1, :-2] + grid[top - 1:bottom - 1, 1:-1]
+    neighbours += grid[top - 1:bottom - 1, 2:]
+    neighbours += grid[top:bottom, :-2]
+    neighbours += grid[top:bottom, 2:]
+    neighbours += grid[top + 1:bottom + 1, :-2]
+    neighbours += grid[top + 1:bottom + 1, 1:-1]
+    neighbours += grid[top + 1:bottom + 1, 2:]
+
+    temp[top:bottom, 1:-1] = rules[grid[top:bottom, 1:-1], neighbours]
+
+
+class GOLEngineParallel:
+    def __init__(self, width, height, rule=CONWAY, workers=None):
+        self.__width = None
+        self.__height = None
+        self.__grid = None
+        self.__temp = None
+        self.__grid_shm = None
+        self.__temp_shm = None
+        self.__bands = None # (top, bottom) de chaque bande
+        self.__pool = None
+        self.__workers = workers if workers is not None else os.cpu_count()
+        self.__rng = np.random.default_rng() # générateur de randomize()
+        self.__iterations = 0 # compteur d'itérations
+
+        if not isinstance(self.__workers, int):
+            raise TypeError('workers must be an int')
+        if self.__workers < 1:
+            raise ValueError('workers must be at least 1')
+
+        # LUT des règles (voir GOLRule), envoyées aux workers avec chaque bande
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.rule = rule
+
+        self.resize(width, height)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def width(self):
+        return self.__width
+
+    @width.setter
+    def width(self, value):
+        self.resize(value, self.__height)
+
+    @property
+    def height(self):
+        return self.__height
+
+    @height.setter
+    def height(self, value):
+        self.resize(self.__width, value)
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        self.__dead_rule, self.__alive_rule = parse_rule(value)
+        self.__rules = (self.__dead_rule, self.__alive_rule)
+
+    @property
+    def workers(self):
+        return self.__workers
+
+    @property
+    def cells(self): # copie de la grille courante (hauteur, largeur) en uint8
+        # pas de vue : la mémoire partagée est libérée par resize() et close()
+        return self.__grid.copy()
+
+    def get_cell(self, x, y):
+        return int(self.__grid[y, x])
+
+    def set_cell(self, x, y, value):
+        self.__grid[y, x] = value
+
+    def __release_buffers(self):
+        self.__grid = None
+        self.__temp = None
+        for shm in (self.__grid_shm, self.__temp_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.__grid_shm = None
+        self.__temp_shm = None
+
+    def resize(self, width, height):
+        validate_size(width, MAX_SIZE)
+        validate_size(height, MAX_SIZE)
+
+        self.__release_buffers()
+        self.__width = width
+        self.__height = height
+        self.__grid_shm = shared_memory.SharedMemory(create=True, size=width * height)
+        self.__temp_shm = shared_memory.SharedMemory(create=True, size=width * height)
+        self.__grid = np.ndarray((height, width), dtype=np.uint8, buffer=self.__grid_shm.buf)
+        self.__temp = np.ndarray((height, width), dtype=np.uint8, buffer=self.__temp_shm.buf)
+        self.__grid[:] = 0
+        self.__temp[:] = 0
+
+        # une bande par worker sur les rangées intérieures
+        limits = np.linspace(1, height - 1, min(self.__workers, height - 2) + 1).astype(int)
+        self.__bands = tuple(zip(limits[:-1].tolist(), limits[1:].tolist()))
+
+    def randomize(self, percent=0.5, seed=None):
+        self.__rng = reseed(self.__rng, seed)
+        # la bordure reste morte, comme dans GOLEngine
+        self.__grid[1:-1, 1:-1] = self.__rng.random((self.__height - 2, self.__width - 2), dtype=np.float32) > percent
+
+    def __step(self):
+        if self.__workers == 1:
+            # dans ce processus : directement sur les tampons, sans attacher la
+            # mémoire partagée une seconde fois (handles jamais refermés sinon)
+            top, bottom = self.__bands[0]
+            _step_rows(self.__grid, self.__temp, top, bottom, self.__rules)
+        else:
+            shape = (self.__height, self.__width)
+            tasks = [(self.__grid_shm.name, self.__temp_shm.name, shape, top, bottom, self.__rules)
+                     for top, bottom in self.__bands]
+            if self.__pool is None:
+                self.__pool = Pool(self.__workers)
+            self.__pool.map(_step_band, tasks)
+
+        self.__grid, self.__temp = self.__temp, self.__grid
+        self.__grid_shm, self.__temp_shm = self.__temp_shm, self.__grid_shm
+
+    def process(self, n=1):
+        run_generations(self.__step, n)
+
+        self.__iterations += n # incrémentation du compteur
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+        self.__release_buffers()
+
+    @property
+    def live_cells(self): # renvoie le nb de cels vivantes
+        return int(np.count_nonzero(self.__grid))
+
+    @property
+    def dead_cells(self): # renvoie le nb de cels mortes
+        return self.width * self.height - self.live_cells
+
+    @property
+    def iterations(self): # renvoie le nb d'itérations effectuées
+        return self.__iterations
+
+    def print(self):
+        for row in self.__grid:
+            print(''.join(str(cell) for cell in row))
+        print()
+
+
+
+# quelques tests simples
+def main():
+    with GOLEngineParallel(12, 8, workers=2) as gol:
+        gol.randomize()
+        gol.print()
+        gol.process()
+        gol.print()
+
+    # accélération selon le nombre de workers sur une grille 10000 x 10000
+    reference = None
+    for workers in range(1, os.cpu_count() + 1):
+        with GOLEngineParallel(10000, 10000, workers=workers) as gol:
+            gol.randomize()
+            gol.process() # démarrage du pool
+            start = time.perf_counter()
+            for _ in range(5):
+                gol.process()
+            elapsed = (time.perf_counter() - start) / 5
+        reference = reference or elapsed
+        print(f'{workers} worker(s) : {elapsed * 1000:.1f} ms / génération (x{reference / elapsed:.2f})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import time
+import numpy as np
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import run_generations
+
+# Moteur de jeu de la vie clairsemé sur un plan non borné.
+#
+# Seules les cellules vivantes sont conservées, dans un tableau trié de
+# clés int64 (y signé sur les 32 bits de poids fort, x décalé sur les 32
+# bits de poids faible : l'ordre des clés est l'ordre des rangées). Une
+# génération :
+# - décale les clés vivantes dans les 8 directions
+# - compte les occurrences de chaque clé (np.unique) : c'est le nombre de
+#   voisins vivants de toutes les cellules qui en ont au moins un
+# - applique la LUT __rules[état][Nvoisins]
+# La mémoire et le temps de calcul sont donc proportionnels à la population
+# et non à la surface : planeurs et canons peuvent voyager indéfiniment
+# (dans les limites d'un int32 pour chaque coordonnée). Au-delà, les cellules
+# sont mortes : une cellule au bord de l'intervalle n'a pas de voisins
+# hors de l'intervalle (la clé déborderait sur la rangée voisine ou sur le
+# signe) et rien n'y naît.
+
+COORD_BITS = 32
+COORD_OFFSET = 1 << (COORD_BITS - 1) # x est décalé pour être positif dans la clé
+COORD_MASK = (1 << COORD_BITS) - 1
+
+# décalage (dx, dy) et décalage de clé vers chacun des 8 voisins
+_NEIGHBOUR_DX, _NEIGHBOUR_DY = np.array([(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                                         if dx != 0 or dy != 0], dtype=np.int64).T
+_NEIGHBOUR_OFFSETS = _NEIGHBOUR_DY * (1 << COORD_BITS) + _NEIGHBOUR_DX
+
+
+def _key(x, y):
+    return (y << COORD_BITS) + x + COORD_OFFSET
+
+
+class GOLEngineSparse:
+    def __init__(self, rule=CONWAY):
+        self.__cells = np.empty(0, dtype=np.int64) # clés triées des cellules vivantes
+        self.__iterations = 0 # compteur d'itérations
+
+        # LUT des règles (voir GOLRule), sans B0 sur un plan non borné
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.rule = rule
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        dead_rule, alive_rule = parse_rule(value)
+        # avec B0, le vide infini devient vivant : impossible à représenter
+        if dead_rule[0]:
+            raise ValueError('rules with B0 are not supported on an unbounded plane')
+        self.__dead_rule, self.__alive_rule = dead_rule, alive_rule
+        self.__rules = np.array((self.__dead_rule, self.__alive_rule), dtype=np.uint8)
+
+    def __validate_coordinate(self, value):
+        if not(-COORD_OFFSET <= value < COORD_OFFSET):
+            raise ValueError(f'coordinates must be between {-COORD_OFFSET} and {COORD_OFFSET - 1}')
+
+    def get_cell(self, x, y):
+        self.__validate_coordinate(x)
+        self.__validate_coordinate(y)
+        key = _key(x, y)
+        index = np.searchsorted(self.__cells, key)
+        return int(index < self.__cells.size and self.__cells[index] == key)
+
+    def set_cell(self, x, y, value):
+        self.__validate_coordinate(x)
+        self.__validate_coordinate(y)
+        key = _key(x, y)
+        index = np.searchsorted(self.__cells, key)
+        alive = index < self.__cells.size and self.__cells[index] == key
+        if value and not alive:
+            self.__cells = np.insert(self.__cells, index, key)
+        elif not value and alive:
+            self.__cells = np.delete(self.__cells, index)
+
+    def clear(self):
+        self.__cells = np.empty(0, dtype=np.int64)
+
+    def __step(self):
+        cells = self.__cells
+        if cells.size == 0:
+            return
+
+        # toutes les cellules voisines d'une cellule vivante (une fois par voisin
+        # vivant) + les cellules vivantes elles-mêmes (pour les isolées)
+        neighbour_keys = cells[:, np.newaxis] + _NEIGHBOUR_OFFSETS
+        xs = cells & COORD_MASK # x décalé, dans [0, COORD_MASK]
+        ys = cells >> COORD_BITS
+        if ys[0] == -COORD_OFFSET or ys[-1] == COORD_OFFSET - 1 or xs.min() == 0 or xs.max() == COORD_MASK:
+            # cellules au bord de l'intervalle : les voisins hors de l'intervalle
+            # (clés débordées) sont écartés
+            shifted_x = xs[:, np.newaxis] + _NEIGHBOUR_DX
+            shifted_y = ys[:, np.newaxis] + _NEIGHBOUR_DY
+            inside = ((shifted_x >= 0) & (shifted_x <= COORD_MASK)
+                      & (shifted_y >= -COORD_OFFSET) & (shifted_y < COORD_OFFSET))
+            neighbour_keys = neighbour_keys[inside]
+        candidates = np.concatenate((neighbour_keys.ravel(), cells))
+        keys, counts = np.unique(candidates, return_counts=True)
+
+        # état actuel de chaque candidate : recherche dans le tableau trié
+        index = np.searchsorted(cells, keys)
+        index[index == cells.size] = 0
+        state = (cells[index] == keys).astype(np.uint8)
+        neighbours = counts - state
+
+        self.__cells = keys[self.__rules[state, neighbours] == 1]
+
+    def process(self, n=1):
+        run_generations(self.__step, n)
+
+        self.__iterations += n # incrémentation du compteur
+
+    def bounding_box(self): # (x min, y min, x max, y max) des cellules vivantes, None si vide
+        if self.__cells.size == 0:
+            return None
+        ys = self.__cells >> COORD_BITS
+        xs = (self.__cells & COORD_MASK) - COORD_OFFSET
+        return int(xs.min()), int(ys[0]), int(xs.max()), int(ys[-1])
+
+    @property
+    def live_cells(self): # renvoie le nb de cels vivantes
+        return int(self.__cells.size)
+
+    @property
+    def iterations(self): # renvoie le nb d'itérations effectuées
+        return self.__iterations
+
+    def print(self):
+        box = self.bounding_box()
+        if box is not None:
+            min_x, min_y, max_x, max_y = box
+            for y in range(min_y, max_y + 1):
+                print(''.join(str(self.get_cell(x, y)) for x in range(min_x, max_x + 1)))
+        print()
+
+
+
+# quelques tests simples
+def main():
+    # canon de Gosper : la population croît sans limite
+    gun = ('........................O...........',
+           '......................O.O...........',
+           '............OO......OO............OO',
+           '...........O...O....OO............OO',
+           'OO........O.....O...OO..............',
+           'OO........O...O.OO....O.O...........',
+           '..........O.....O.......O...........',
+           '...........O...O....................',
+           '............OO......................')
+    gol = GOLEngineSparse()
+    for y, row in enumerate(gun):
+        for x, cell in enumerate(row):
+            gol.set_cell(x, y, cell == 'O')
+    gol.print()
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        gol.process()
+    elapsed = time.perf_counter() - start
+    print(f'{gol.iterations} générations en {elapsed:.2f} s : {gol.live_cells} cellules vivantes, '
+          f'boîte englobante {gol.bounding_box()}')
+
+    # planeur vers le bas à droite, jusqu'au coin de l'intervalle : il s'y
+    # écrase au lieu de réapparaître de l'autre côté
+    edge = COORD_OFFSET - 1
+    corner = GOLEngineSparse()
+    for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+        corner.set_cell(edge - 8 + x, edge - 8 + y, 1)
+    corner.process(100)
+    min_x, min_y, max_x, max_y = corner.bounding_box()
+    assert edge - 8 <= min_x and max_x <= edge and edge - 8 <= min_y and max_y <= edge
+    print(f'Planeur au coin ({edge}, {edge}) : {corner.live_cells} cellules vivantes, boîte {corner.bounding_box()}')
+
+if __name__ == '__main__':
+    main()
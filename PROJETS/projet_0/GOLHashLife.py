@@ -0,0 +1,346 @@
+import random
+import time
+from GOLRule import CONWAY, parse_rule, rule_string
+from GOLEngineCommon import validate_generations
+
+# Moteur HashLife (quadtree mémoïsé) pour avancer le jeu de la vie de
+# plusieurs générations d'un coup.
+#
+# Le monde est un plan infini (tout est mort à l'extérieur) représenté par
+# un quadtree dont chaque noeud est unique (hash consing) : deux régions
+# identiques partagent le même noeud, et le résultat de chaque noeud après
+# 2^j générations est mémorisé. Les motifs périodiques ou clairsemés
+# avancent ainsi exponentiellement vite.
+#
+# Même règles (LUT __rules) que GOLEngine ; get_cell, set_cell, live_cells,
+# iterations et process() permettent de comparer les deux moteurs pas à pas.
+#
+# La table des noeuds est bornée (max_nodes), y compris pendant un pas :
+# __successor la vérifie à chaque appel et, quand elle déborde, seuls les
+# noeuds atteignables depuis la racine ou depuis les calculs en cours (pile
+# __pinned) sont conservés, avec les résultats mémorisés qui n'utilisent que
+# ces noeuds. Entre deux vérifications, un appel ne crée qu'un nb constant de
+# noeuds par niveau de récursion. Si les noeuds encore utilisés dépassent à
+# eux seuls la moitié de la borne, le seuil passe au double de leur nombre
+# pour ne pas relancer la collecte à chaque appel.
+
+
+class _Node:
+    # nw, ne, sw, se : quadrants (haut-gauche, haut-droite, bas-gauche, bas-droite)
+    # level : le noeud couvre un carré de 2^level cellules de côté
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population')
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class GOLHashLife:
+    def __init__(self, rule=CONWAY, max_nodes=1 << 20):
+        self.__max_nodes = max_nodes
+        self.__limit = max_nodes # taille de la table qui déclenche la collecte
+        self.__pinned = [] # noeuds utilisés par les appels de __successor en cours
+        self.__nodes = {} # table des noeuds uniques : (nw, ne, sw, se) -> noeud
+        self.__results = {} # mémo : (noeud, j) -> centre du noeud après 2^j générations
+        self.__iterations = 0 # compteur d'itérations
+
+        # LUT des règles (voir GOLRule), appliquées au calcul des noeuds de niveau 2
+        self.__alive_rule = None
+        self.__dead_rule = None
+        self.__rules = None
+        self.rule = rule
+
+        # feuilles (une cellule) : morte et vivante
+        self.__leaves = (_Node(None, None, None, None, 0, 0), _Node(None, None, None, None, 0, 1))
+        self.__empty = [self.__leaves[0]] # noeud vide pour chaque niveau
+
+        self.__root = self.__empty_node(3)
+
+    @property
+    def rule(self): # rulestring normalisée, p. ex. B3/S23
+        return rule_string(self.__dead_rule, self.__alive_rule)
+
+    @rule.setter
+    def rule(self, value):
+        dead_rule, alive_rule = parse_rule(value)
+        # avec B0, le vide infini devient vivant : incompatible avec le quadtree
+        if dead_rule[0]:
+            raise ValueError('rules with B0 are not supported by HashLife')
+        self.__dead_rule, self.__alive_rule = dead_rule, alive_rule
+        self.__rules = (self.__dead_rule, self.__alive_rule)
+        self.__results = {} # les résultats mémorisés dépendent de la règle
+
+    def __join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self.__nodes.get(key)
+        if node is None:
+            node = _Node(nw, ne, sw, se, nw.level + 1,
+                         nw.population + ne.population + sw.population + se.population)
+            self.__nodes[key] = node
+        return node
+
+    def __empty_node(self, level):
+        while len(self.__empty) <= level:
+            empty = self.__empty[-1]
+            self.__empty.append(self.__join(empty, empty, empty, empty))
+        return self.__empty[level]
+
+    def __expand(self, node):
+        # même contenu, centré dans un noeud de niveau supérieur
+        empty = self.__empty_node(node.level - 1)
+        return self.__join(self.__join(empty, empty, empty, node.nw),
+                           self.__join(empty, empty, node.ne, empty),
+                           self.__join(empty, node.sw, empty, empty),
+                           self.__join(node.se, empty, empty, empty))
+
+    def __centre(self, node):
+        # carré central de niveau level - 1
+        return self.__join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def __inner_population(self, node):
+        # population du carré central de niveau level - 2
+        return (node.nw.se.se.population + node.ne.sw.sw.population
+                + node.sw.ne.ne.population + node.se.nw.nw.population)
+
+    def __life_4x4(self, node):
+        # cas de base : centre 2x2 d'un noeud 4x4 après une génération
+        cells = [[0] * 4 for _ in range(4)]
+        for qy, qx, quadrant in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[qy][qx] = quadrant.nw.population
+            cells[qy][qx + 1] = quadrant.ne.population
+            cells[qy + 1][qx] = quadrant.sw.population
+            cells[qy + 1][qx + 1] = quadrant.se.population
+
+        centre = []
+        for y in (1, 2):
+            for x in (1, 2):
+                neighbours = sum(cells[y - 1][x - 1:x + 2]) \
+                    + sum(cells[y][x - 1:x + 2:2]) \
+                    + sum(cells[y + 1][x - 1:x + 2])
+                centre.append(self.__leaves[self.__rules[cells[y][x]][neighbours]])
+        return self.__join(*centre)
+
+    def __successor(self, node, j):
+        # centre (niveau level - 1) du noeud après 2^j générations, j <= level - 2
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self.__results.get(key)
+        if result is not None:
+            return result
+
+        # node est épinglé avant la collecte : la racine étendue passée par
+        # advance() n'est atteignable depuis aucun autre noeud épinglé
+        pinned = self.__pinned
+        mark = len(pinned)
+        pinned.append(node)
+        if len(self.__nodes) > self.__limit:
+            self.__collect()
+
+        if node.level == 2:
+            result = self.__life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # 9 sous-carrés de niveau level - 1 qui se chevauchent
+            n00 = nw
+            n01 = self.__join(nw.ne, ne.nw, nw.se, ne.sw)
+            n02 = ne
+            n10 = self.__join(nw.sw, nw.se, sw.nw, sw.ne)
+            n11 = self.__centre(node)
+            n12 = self.__join(ne.sw, ne.se, se.nw, se.ne)
+            n20 = sw
+            n21 = self.__join(sw.ne, se.nw, sw.se, se.sw)
+            n22 = se
+            # les sous-carrés et résultats intermédiaires doivent survivre à
+            # une collecte déclenchée par les appels récursifs suivants
+            pinned.extend((n01, n10, n11, n12, n21))
+
+            if j < node.level - 2:
+                # 2^j générations sur les 9 sous-carrés puis on garde leurs centres
+                c = [self.__pin(self.__successor(n, j)) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+                result = self.__join(self.__join(c[0].se, c[1].sw, c[3].ne, c[4].nw),
+                                     self.__join(c[1].se, c[2].sw, c[4].ne, c[5].nw),
+                                     self.__join(c[3].se, c[4].sw, c[6].ne, c[7].nw),
+                                     self.__join(c[4].se, c[5].sw, c[7].ne, c[8].nw))
+            else:
+                # deux demi-pas de 2^(level - 3) générations
+                step = node.level - 3
+                c = [self.__pin(self.__successor(n, step)) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+                quarters = [self.__pin(self.__join(c[a], c[b], c[d], c[e]))
+                            for a, b, d, e in ((0, 1, 3, 4), (1, 2, 4, 5), (3, 4, 6, 7), (4, 5, 7, 8))]
+                result = self.__join(*[self.__pin(self.__successor(quarter, step)) for quarter in quarters])
+
+        del pinned[mark:]
+        self.__results[key] = result
+        return result
+
+    def __pin(self, node):
+        self.__pinned.append(node)
+        return node
+
+    def __collect(self):
+        # garbage collection : on ne garde que les noeuds atteignables depuis la
+        # racine ou les calculs en cours, et les résultats qui n'utilisent qu'eux
+        reachable = {}
+        stack = [self.__root] + self.__empty[1:] + self.__pinned
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key not in reachable:
+                reachable[key] = node
+                stack.extend(key)
+        self.__nodes = reachable
+        kept = set(reachable.values())
+        kept.update(self.__leaves)
+        self.__results = {key: result for key, result in self.__results.items()
+                          if key[0] in kept and result in kept}
+        self.__limit = max(self.__max_nodes, 2 * len(reachable))
+
+    def advance(self, generations):
+        if not isinstance(generations, int):
+            raise TypeError('generations must be an int')
+        if generations < 0:
+            raise ValueError('generations must be positive')
+
+        j = 0
+        while generations:
+            if generations & 1:
+                # marge suffisante : le motif tient dans le carré central de
+                # niveau level - 2 et 2^j <= 2^(level - 3)
+                root = self.__root
+                while root.level < j + 3 or self.__inner_population(root) != root.population:
+                    root = self.__expand(root)
+                self.__root = self.__successor(self.__expand(root), j)
+                self.__iterations += 1 << j
+                if len(self.__nodes) > self.__limit:
+                    self.__collect()
+            generations >>= 1
+            j += 1
+
+    def process(self, n=1):
+        validate_generations(n)
+        self.advance(n)
+
+    def __contains(self, x, y):
+        half = 1 << (self.__root.level - 1)
+        return -half <= x < half and -half <= y < half
+
+    def get_cell(self, x, y):
+        if not self.__contains(x, y):
+            return 0
+        node = self.__root
+        half = 1 << (node.level - 1)
+        x += half
+        y += half
+        while node.level > 0:
+            half = 1 << (node.level - 1)
+            if y < half:
+                node = node.nw if x < half else node.ne
+            else:
+                node = node.sw if x < half else node.se
+            x %= half
+            y %= half
+        return node.population
+
+    def __set(self, node, x, y, value):
+        if node.level == 0:
+            return self.__leaves[1 if value else 0]
+        half = 1 << (node.level - 1)
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        if y < half:
+            if x < half:
+                nw = self.__set(nw, x, y, value)
+            else:
+                ne = self.__set(ne, x - half, y, value)
+        else:
+            if x < half:
+                sw = self.__set(sw, x, y - half, value)
+            else:
+                se = self.__set(se, x - half, y - half, value)
+        return self.__join(nw, ne, sw, se)
+
+    def set_cell(self, x, y, value):
+        while not self.__contains(x, y):
+            self.__root = self.__expand(self.__root)
+        half = 1 << (self.__root.level - 1)
+        self.__root = self.__set(self.__root, x + half, y + half, value)
+
+    @property
+    def live_cells(self): # renvoie le nb de cels vivantes
+        return self.__root.population
+
+    @property
+    def iterations(self): # renvoie le nb d'itérations effectuées
+        return self.__iterations
+
+    @property
+    def node_count(self): # renvoie le nb de noeuds dans la table
+        return len(self.__nodes)
+
+    def is_canonical(self): # chaque noeud atteignable depuis la racine ou le mémo est celui de la table
+        stack = [self.__root]
+        for (node, _), result in self.__results.items():
+            stack.extend((node, result))
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if self.__nodes.get(key) is not node:
+                return False
+            stack.extend(key)
+        return True
+
+
+
+# quelques tests simples
+def main():
+    from GOLEngineNumpy import GOLEngineNumpy
+
+    # comparaison pas à pas avec GOLEngineNumpy sur une soupe au centre
+    # d'une grande grille (la bordure n'est jamais atteinte)
+    engine = GOLEngineNumpy(200, 200)
+    hashlife = GOLHashLife()
+    for y in range(90, 110):
+        for x in range(90, 110):
+            value = int(random.random() > 0.5)
+            engine.set_cell(x, y, value)
+            hashlife.set_cell(x, y, value)
+    for _ in range(50):
+        engine.process()
+        hashlife.process()
+        assert all(engine.get_cell(x, y) == hashlife.get_cell(x, y) for y in range(200) for x in range(200))
+    print(f'Identique à GOLEngineNumpy sur 50 générations ({hashlife.live_cells} cellules vivantes)')
+
+    # petite table pleine de noeuds inutiles : la collecte a lieu dès le premier
+    # appel de __successor, la racine étendue par advance() doit y survivre
+    small = GOLHashLife(max_nodes=200)
+    for i in range(100):
+        small.set_cell(i, i, 1)
+        small.set_cell(i, i, 0)
+    for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+        small.set_cell(x, y, 1)
+    for _ in range(4):
+        small.advance(1)
+        assert small.is_canonical()
+    print(f'Table bornée à 200 noeuds : noeuds canoniques après {small.iterations} générations '
+          f'({small.node_count} noeuds)')
+
+    # planeur : 2^40 générations d'un coup
+    glider = GOLHashLife()
+    for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+        glider.set_cell(x, y, 1)
+    start = time.perf_counter()
+    glider.advance(1 << 40)
+    elapsed = time.perf_counter() - start
+    print(f'Planeur après {glider.iterations} générations : {glider.live_cells} cellules vivantes '
+          f'({elapsed * 1000:.1f} ms, {glider.node_count} noeuds)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import re
+import struct
+
+import numpy as np
+
+# Lecture et écriture des motifs et des sauvegardes du jeu de la vie.
+#
+# Trois formats :
+# - RLE (.rle) : format standard des collections de motifs (LifeWiki,
+#   Golly), les suites de cellules identiques sont comptées (3o2b$...)
+# - plaintext (.cells) : une rangée par ligne, '.' morte et 'O' vivante
+# - snapshot (.gol) : sauvegarde brute d'un monde entier, 1 bit par cellule,
+#   pensée pour être mappée en mémoire (np.memmap) : lecture et écriture à
+#   la vitesse du disque, sans passer par des listes Python
+#
+# Les motifs sont des ndarray uint8 (hauteur, largeur) de 0 et de 1, comme
+# la propriété cells des moteurs.
+#
+# Disposition d'un snapshot :
+#   en-tête de 64 octets (voir _HEADER) : magic, version, largeur, hauteur,
+#   itérations, règle, mode de bordure
+#   puis une rangée de mots uint64 little-endian par rangée de la grille ;
+#   le bit i du mot j est la cellule x = 64 * j + i (même disposition que
+#   GOLEngineBitPacked, qui peut donc copier ses mots tels quels)
+
+PATTERN_FORMATS = ('.rle', '.cells')
+SNAPSHOT_FORMAT = '.gol'
+
+SNAPSHOT_MAGIC = b'GOLS'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<4sHxxIIQ24s16s') # 64 octets : les mots qui suivent restent alignés
+
+RLE_LINE_LENGTH = 70 # longueur maximale d'une ligne RLE (convention des collections)
+BAND_ROWS = 256 # rangées converties à la fois (mémoire temporaire bornée)
+
+_RLE_HEADER = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?', re.IGNORECASE)
+_RLE_TOKEN = re.compile(r'(\d*)([^\d\s])')
+
+
+def _pattern_format(path):
+    extension = str(path)[str(path).rfind('.'):].lower()
+    if extension not in PATTERN_FORMATS:
+        raise ValueError(f'unsupported pattern format {extension!r} (expected one of {PATTERN_FORMATS})')
+    return extension
+
+
+def parse_rle(text):
+    # renvoie (cells, rulestring ou None)
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line and not line.startswith('#')]
+    if not lines:
+        raise ValueError('empty RLE pattern')
+    header = _RLE_HEADER.match(lines[0])
+    if header is None:
+        raise ValueError('invalid RLE header (expected "x = ..., y = ...")')
+    width, height, rule = int(header.group(1)), int(header.group(2)), header.group(3)
+
+    cells = np.zeros((height, width), dtype=np.uint8)
+    x = y = 0
+    for count, tag in _RLE_TOKEN.findall(''.join(lines[1:])):
+        count = int(count) if count else 1
+        if tag == '!':
+            break
+        if tag == '$':
+            x = 0
+            y += count
+        elif tag in 'b.':
+            x += count
+        else: # o (et les états des règles à plusieurs états, considérés vivants)
+            if y >= height or x + count > width:
+                raise ValueError(f'RLE pattern does not fit in its {width} x {height} header')
+            cells[y, x:x + count] = 1
+            x += count
+    return cells, rule
+
+
+def to_rle(cells, rule=None):
+    # texte RLE du motif (sans les rangées et colonnes vides autour)
+    cells = _crop(cells)
+    height, width = cells.shape
+    header = f'x = {width}, y = {height}' + (f', rule = {rule}' if rule else '')
+
+    tokens = []
+    previous = 0
+    for y in np.flatnonzero(cells.any(axis=1)).tolist():
+        if y > previous:
+            tokens.append(_rle_run(y - previous, '$')) # fin de rangée (et rangées vides)
+        previous = y
+        # suites de cellules vivantes : positions où la valeur change
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], cells[y], [0])))).tolist()
+        x = 0
+        for start, stop in zip(edges[::2], edges[1::2]):
+            if start > x:
+                tokens.append(_rle_run(start - x, 'b'))
+            tokens.append(_rle_run(stop - start, 'o'))
+            x = stop
+    tokens.append('!')
+
+    lines = [header]
+    line = ''
+    for token in tokens:
+        if len(line) + len(token) > RLE_LINE_LENGTH:
+            lines.append(line)
+            line = ''
+        line += token
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _rle_run(count, tag):
+    return f'{count}{tag}' if count > 1 else tag
+
+
+def parse_cells(text):
+    # renvoie les cellules d'un motif plaintext
+    rows = [line.rstrip() for line in text.splitlines() if not line.startswith('!')]
+    width = max((len(row) for row in rows), default=0)
+    if not rows or width == 0:
+        raise ValueError('empty plaintext pattern')
+    cells = np.zeros((len(rows), width), dtype=np.uint8)
+    for y, row in enumerate(rows):
+        characters = np.frombuffer(row.encode('ascii'), dtype=np.uint8)
+        if not np.isin(characters, (ord('.'), ord('O'), ord('*'))).all():
+            raise ValueError(f'invalid plaintext row {y + 1} (expected only "." and "O")')
+        cells[y, :characters.size] = characters != ord('.')
+    return cells
+
+
+def to_cells(cells, name=None):
+    # texte plaintext du motif (sans les rangées et colonnes vides autour)
+    symbols = np.array((ord('.'), ord('O')), dtype=np.uint8)[_crop(cells)]
+    lines = [f'!Name: {name}'] if name else []
+    lines.extend(row.tobytes().decode('ascii') for row in symbols)
+    return '\n'.join(lines) + '\n'
+
+
+def _crop(cells):
+    # plus petit rectangle contenant toutes les cellules vivantes
+    rows = np.flatnonzero(cells.any(axis=1))
+    if rows.size == 0:
+        return cells[:0, :0]
+    columns = np.flatnonzero(cells.any(axis=0))
+    return cells[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+
+
+def load_pattern(path):
+    # renvoie (cells, rulestring ou None) selon l'extension du fichier
+    extension = _pattern_format(path)
+    with open(path, encoding='ascii') as file:
+        text = file.read()
+    if extension == '.rle':
+        return parse_rle(text)
+    return parse_cells(text), None
+
+
+def save_pattern(path, cells, rule=None):
+    extension = _pattern_format(path)
+    text = to_rle(cells, rule) if extension == '.rle' else to_cells(cells)
+    with open(path, 'w', encoding='ascii') as file:
+        file.write(text)
+
+
+def snapshot_words(width): # nb de mots uint64 par rangée
+    return (width + 63) // 64
+
+
+def create_snapshot(path, width, height, rule, boundary='dead', iterations=0):
+    # crée le fichier et renvoie ses rangées de mots (hauteur, mots) mappées en mémoire, à remplir
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, width, height, iterations,
+                          rule.encode('ascii'), boundary.encode('ascii'))
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.truncate(_HEADER.size + height * snapshot_words(width) * 8)
+    return np.memmap(path, dtype='<u8', mode='r+', offset=_HEADER.size, shape=(height, snapshot_words(width)))
+
+
+def open_snapshot(path):
+    # renvoie (rangées de mots en lecture seule et mappées en mémoire, largeur, hauteur, règle, bordure, itérations)
+    with open(path, 'rb') as file:
+        header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError('truncated snapshot header')
+    magic, version, width, height, iterations, rule, boundary = _HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError('not a GOL snapshot')
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f'unsupported snapshot version {version}')
+    words = np.memmap(path, dtype='<u8', mode='r', offset=_HEADER.size, shape=(height, snapshot_words(width)))
+    return (words, width, height, rule.rstrip(b'\0').decode('ascii'),
+            boundary.rstrip(b'\0').decode('ascii'), iterations)
+
+
+def pack_rows(cells, words):
+    # cellules uint8 (hauteur, largeur) -> mots (hauteur, mots), par bandes de rangées
+    nbytes = (cells.shape[1] + 7) // 8
+    packed = words.view(np.uint8)
+    for top in range(0, cells.shape[0], BAND_ROWS):
+        band = slice(top, top + BAND_ROWS)
+        packed[band, :nbytes] = np.packbits(cells[band], axis=1, bitorder='little')
+        packed[band, nbytes:] = 0
+
+
+def unpack_rows(words, cells):
+    # mots (hauteur, mots) -> cellules uint8 (hauteur, largeur), par bandes de rangées
+    packed = words.view(np.uint8)
+    for top in range(0, cells.shape[0], BAND_ROWS):
+        band = slice(top, top + BAND_ROWS)
+        cells[band] = np.unpackbits(packed[band], axis=1, count=cells.shape[1], bitorder='little')
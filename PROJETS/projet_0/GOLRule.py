@@ -0,0 +1,58 @@
+# Compilation des règles « Life-like » au format B/S (rulestring).
+#
+# Une rulestring comme B36/S23 donne les nombres de voisins vivants pour
+# lesquels une cellule morte naît (B, birth) et une cellule vivante survit
+# (S, survival). Elle est compilée une seule fois en deux LUT de 9 valeurs
+# (LUT : Look-Up Table), __dead_rule / __alive_rule dans chaque moteur, qui
+# indiquent directement si une cellule est vivante à la génération suivante :
+# à l'index i se trouve le nombre de voisins vivants (Nvoisins).
+#
+#    Nvoisins -----> 0  1  2  3  4  5  6  7  8
+#                    |  |  |  |  |  |  |  |  |
+#                    v  v  v  v  v  v  v  v  v
+#    B3/S23 (Conway)  -->  dead_rule  = (0, 0, 0, 1, 0, 0, 0, 0, 0)
+#                          alive_rule = (0, 0, 1, 1, 0, 0, 0, 0, 0)
+#
+# Les moteurs les rangent dans __rules = (dead_rule, alive_rule) : la
+# génération suivante d'une cellule est __rules[état][Nvoisins].
+
+CONWAY = 'B3/S23'
+
+# règles proposées dans GOLApp : (nom, rulestring)
+PRESETS = (
+    ('Conway', 'B3/S23'),
+    ('HighLife', 'B36/S23'),
+    ('Seeds', 'B2/S'),
+    ('Day & Night', 'B3678/S34678'),
+    ('Life without death', 'B3/S012345678'),
+    ('Replicator', 'B1357/S1357'),
+)
+
+
+def parse_rule(rulestring):
+    # renvoie (dead_rule, alive_rule) pour une rulestring B.../S...
+    if not isinstance(rulestring, str):
+        raise TypeError('rule must be a str')
+
+    parts = {}
+    for part in rulestring.upper().replace(' ', '').split('/'):
+        if not part or part[0] not in 'BS' or part[0] in parts:
+            raise ValueError(f'invalid rule {rulestring!r} (expected a B/S rulestring such as B3/S23)')
+        digits = part[1:]
+        if not all(digit in '012345678' for digit in digits):
+            raise ValueError(f'invalid rule {rulestring!r} (neighbour counts must be between 0 and 8)')
+        parts[part[0]] = set(int(digit) for digit in digits)
+
+    if set(parts) != {'B', 'S'}:
+        raise ValueError(f'invalid rule {rulestring!r} (expected a B/S rulestring such as B3/S23)')
+
+    dead_rule = tuple(int(n in parts['B']) for n in range(9))
+    alive_rule = tuple(int(n in parts['S']) for n in range(9))
+    return dead_rule, alive_rule
+
+
+def rule_string(dead_rule, alive_rule):
+    # forme normalisée (B.../S...) d'une paire de LUT
+    birth = ''.join(str(n) for n, value in enumerate(dead_rule) if value)
+    survival = ''.join(str(n) for n, value in enumerate(alive_rule) if value)
+    return f'B{birth}/S{survival}'
@@ -0,0 +1,206 @@
+import threading
+import time
+
+import numpy as np
+
+from PySide6.QtCore import QThread, Signal
+
+from __feature__ import snake_case, true_property
+
+# Simulation du jeu de la vie dans un thread séparé de l'interface.
+#
+# Le thread calcule les générations aussi vite que la vitesse demandée le
+# permet et publie après chaque lot une copie de la grille (snapshot).
+# L'interface affiche le dernier snapshot publié à son propre rythme : un
+# calcul lent ne bloque plus les boutons, et un rendu lent ne ralentit plus
+# la simulation.
+#
+# Les snapshots tournent sur trois tampons : celui en cours d'écriture,
+# le dernier publié et celui en cours de lecture par l'interface. Le
+# thread n'écrit jamais dans un tampon lu, et l'interface ne lit jamais un
+# tampon à moitié écrit, sans qu'aucun des deux n'attende l'autre.
+#
+# Les régions modifiées (pop_changed_regions) s'accumulent entre deux
+# lectures : si l'interface saute des snapshots, elle redessine quand même
+# tout ce qui a changé depuis le dernier affichage.
+#
+# Toute modification du moteur depuis l'interface passe par modify() (sous
+# le verrou du moteur) pour ne jamais entrer en concurrence avec process().
+#
+# Avec auto_stop, la simulation s'arrête d'elle-même dès que le moteur
+# détecte un cycle (is_stable) et émet stabilized(période).
+
+FRAME_INTERVAL = 0.016 # s entre deux snapshots quand on calcule plusieurs générations par lot
+GPS_WINDOW = 0.5 # s sur lesquelles sont moyennées les générations par seconde
+
+
+class GOLSimulation(QThread):
+    stabilized = Signal(int) # arrêt automatique : période du cycle atteint
+    
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.__engine_lock = threading.Lock() # protège le moteur
+        self.__snapshot_lock = threading.Lock() # protège les tampons et les infos publiées
+        self.__wake = threading.Event() # réveille le thread (start, stop, vitesse, fin)
+
+        self.__engine = None
+        self.__buffers = None
+        self.__front = 0 # index du dernier snapshot publié
+        self.__reading = None # index du snapshot lu par l'interface
+        self.__fresh = False # un snapshot n'a pas encore été lu
+        self.__regions = [] # régions modifiées depuis la dernière lecture
+        self.__generation = 0
+        self.__live = 0
+        self.__dead = 0
+        self.__period = None
+
+        self.__running = False
+        self.__quit = False
+        self.__auto_stop = False
+        self.__interval = 0.1 # s par génération
+        self.__generations_per_second = 0.0
+
+        self.set_engine(engine)
+
+    @property
+    def engine(self):
+        return self.__engine
+
+    @property
+    def running(self):
+        return self.__running
+
+    @property
+    def interval(self): # s par génération demandées
+        return self.__interval
+
+    @interval.setter
+    def interval(self, value):
+        if value <= 0:
+            raise ValueError('interval must be positive')
+        self.__interval = value
+        self.__wake.set()
+
+    @property
+    def auto_stop(self): # arrêt automatique quand la grille entre dans un cycle
+        return self.__auto_stop
+
+    @auto_stop.setter
+    def auto_stop(self, value):
+        self.__auto_stop = bool(value)
+
+    @property
+    def generations_per_second(self):
+        return self.__generations_per_second
+
+    def set_engine(self, engine):
+        with self.__engine_lock:
+            self.__engine = engine
+            self.__publish()
+
+    def modify(self, function):
+        # applique function(engine) entre deux lots puis publie le résultat
+        # (même en cas d'erreur : le moteur a pu être modifié en partie)
+        with self.__engine_lock:
+            try:
+                function(self.__engine)
+            finally:
+                self.__publish()
+
+    def start_simulation(self):
+        self.__running = True
+        self.__wake.set()
+
+    def stop_simulation(self):
+        self.__running = False
+        self.__wake.set()
+
+    def shutdown(self):
+        self.__quit = True
+        self.__wake.set()
+        self.wait()
+
+    def __publish(self):
+        # appelé sous le verrou du moteur : copie la grille dans un tampon libre
+        with self.__snapshot_lock:
+            shape = (self.__engine.height, self.__engine.width)
+            if self.__buffers is None or self.__buffers[0].shape != shape:
+                # nouvelle taille de grille : nouveaux tampons (l'interface
+                # garde sa référence à l'ancien tampon jusqu'à la fin du rendu)
+                self.__buffers = [np.zeros(shape, dtype=np.uint8) for _ in range(3)]
+                self.__front = 0
+                self.__reading = None
+                self.__regions = []
+            back = next(index for index in range(3) if index not in (self.__front, self.__reading))
+            buffers = self.__buffers
+        np.copyto(buffers[back], self.__engine.cells)
+
+        regions = self.__engine.pop_changed_regions()
+        with self.__snapshot_lock:
+            self.__front = back
+            self.__fresh = True
+            self.__regions.extend(regions)
+            self.__generation = self.__engine.iterations
+            self.__live = self.__engine.live_cells
+            self.__dead = self.__engine.dead_cells
+            self.__period = self.__engine.period
+
+    def take_snapshot(self):
+        # dernier snapshot non lu : (cells, régions modifiées, génération, vivantes, mortes, période), sinon None
+        # le tampon reste réservé à l'interface jusqu'à release_snapshot()
+        with self.__snapshot_lock:
+            if not self.__fresh:
+                return None
+            self.__fresh = False
+            self.__reading = self.__front
+            regions, self.__regions = self.__regions, []
+            return (self.__buffers[self.__front], regions, self.__generation, self.__live, self.__dead, self.__period)
+
+    def release_snapshot(self):
+        with self.__snapshot_lock:
+            self.__reading = None
+
+    def run(self):
+        step_time = None # durée mesurée d'une génération (moyenne lissée)
+        generations = 0
+        window_start = time.perf_counter()
+        while not self.__quit:
+            if not self.__running:
+                self.__generations_per_second = 0.0
+                self.__wake.wait()
+                self.__wake.clear()
+                generations = 0
+                window_start = time.perf_counter()
+                continue
+
+            # au-delà du rafraîchissement de l'écran, on calcule plusieurs
+            # générations par lot plutôt que de publier des images invisibles,
+            # mais un lot ne dure pas plus d'une image : stop et les
+            # modifications de l'interface n'attendent jamais longtemps
+            tick_start = time.perf_counter()
+            interval = self.__interval
+            batch = 1 if interval >= FRAME_INTERVAL else round(FRAME_INTERVAL / interval)
+            if step_time is not None:
+                batch = max(1, min(batch, int(FRAME_INTERVAL / step_time)))
+            with self.__engine_lock:
+                self.__engine.process(batch)
+                self.__publish()
+                period = self.__engine.period
+            if self.__auto_stop and period is not None:
+                self.__running = False
+                self.stabilized.emit(period)
+                continue
+
+            now = time.perf_counter()
+            elapsed = (now - tick_start) / batch
+            step_time = elapsed if step_time is None else 0.8 * step_time + 0.2 * elapsed
+            generations += batch
+            if now - window_start >= GPS_WINDOW:
+                self.__generations_per_second = generations / (now - window_start)
+                generations = 0
+                window_start = now
+
+            # attente jusqu'au prochain lot (interrompue par stop / vitesse / fin)
+            remaining = batch * interval - (now - tick_start)
+            if remaining > 0 and self.__wake.wait(remaining):
+                self.__wake.clear()
@@ -2,6 +2,8 @@ import numpy as np
 import klustr_utils
 from PySide6.QtGui import QVector3D
 
+BATCH_PIXELS = 1 << 18 # nb de pixels traités à la fois par metrics_batch (mémoire des tableaux temporaires)
+
 class Engine:
     def __init__(self, klustr_dao, knn):
         self.klustr_dao = klustr_dao 
@@ -113,10 +115,99 @@ class Engine:
 
 ######## fonction pour retourner les metriques ###############
     def metrics(self, image):
-        metric1 = self._ratio_area_perimeter(image)
-        metric2 = self._circum_circle(image)
-        metric3 = self._inscr_circle(image)
-        return (metric1, metric2, metric3)
+        return tuple(self.metrics_batch([image])[0])
+
+    # Les trois métriques de plusieurs images : (images, 3), dans l'ordre reçu.
+    # Les images de même taille sont empilées (pile 3-D) et traitées ensemble ;
+    # aire, centroïde, périmètre et distances min/max au centroïde sont calculés
+    # une seule fois par image et partagés entre les métriques. Mêmes valeurs que
+    # les fonctions d'une seule image ci-dessus.
+    def metrics_batch(self, images):
+        metrics = np.empty((len(images), 3))
+        groups = {}
+        for i, image in enumerate(images):
+            groups.setdefault(np.shape(image), []).append(i)
+        for (height, width), indices in groups.items():
+            step = max(1, BATCH_PIXELS // max(1, height * width))
+            for start in range(0, len(indices), step):
+                chunk = indices[start:start + step]
+                metrics[chunk] = self._stack_metrics(np.stack([images[i] for i in chunk]))
+        return metrics
+
+    def _stack_metrics(self, stack):
+        # stack : (images, hauteur, largeur), images binaires (0-1) comme celles de klustr_utils
+        count, height, width = stack.shape
+
+        # Aire et centroïde : sommes par colonne et par rangée, sans grille
+        # (sommes exactes en int32 pour les images de 8 bits, plus rapides qu'en int64)
+        accumulator = np.int32 if stack.dtype.itemsize == 1 else None
+        column_sums = stack.sum(axis=1, dtype=accumulator)
+        row_sums = stack.sum(axis=2, dtype=accumulator)
+        area = column_sums.sum(axis=1)
+        if not area.all():
+            raise ValueError('cannot compute the metrics of an empty image')
+        x = (column_sums @ np.arange(width)) / area
+        y = (row_sums @ np.arange(height)) / area
+
+        # Rognage au rectangle qui contient toutes les formes de la pile, plus un
+        # pixel de marge (les bords et les coins ne regardent que les voisins directs)
+        filled_rows = np.flatnonzero(row_sums.any(axis=0))
+        filled_columns = np.flatnonzero(column_sums.any(axis=0))
+        top, bottom = max(filled_rows[0] - 1, 0), min(filled_rows[-1] + 2, height)
+        left, right = max(filled_columns[0] - 1, 0), min(filled_columns[-1] + 2, width)
+        # masque de la forme entouré d'un cadre à True : le bord de l'image n'est pas un bord de la forme
+        framed_mask = np.ones((count, bottom - top + 2, right - left + 2), dtype=bool)
+        form_mask = framed_mask[:, 1:-1, 1:-1]
+        np.not_equal(stack[:, top:bottom, left:right], 0, out=form_mask)
+        reversed_mask = form_mask[:, :, ::-1].copy() # pour trouver le dernier pixel de chaque rangée avec argmax
+        row = np.arange(top, bottom)
+        col = np.arange(left, right)
+        last_col = right - 1 - np.arange(right - left) # col à l'envers
+
+        # Distances au carré au centroïde : écart de rangée + écart de colonne
+        row_squared = (row - y[:, np.newaxis]) ** 2
+        column_squared = (np.arange(width) - x[:, np.newaxis]) ** 2
+        images = np.arange(count)[:, np.newaxis]
+        rows = np.arange(bottom - top)
+
+        # Distance max : sur chaque rangée, le pixel le plus loin est le premier ou le dernier de la forme
+        first = form_mask.argmax(axis=2)
+        last = reversed_mask.argmax(axis=2)
+        farthest = np.maximum(column_squared[images, col[first]], column_squared[images, last_col[last]])
+        farthest = np.where(form_mask[images, rows, first], row_squared + farthest, -np.inf)
+        max_distance = np.sqrt(farthest.max(axis=1))
+
+        # Distance min : sur chaque rangée, le pixel le plus proche est le premier
+        # de la forme à droite du centroïde ou le dernier à sa gauche
+        right_side = form_mask & (col >= x[:, np.newaxis, np.newaxis])
+        left_side = reversed_mask & (last_col <= x[:, np.newaxis, np.newaxis])
+        first = right_side.argmax(axis=2)
+        last = left_side.argmax(axis=2)
+        nearest = np.minimum(np.where(right_side[images, rows, first], column_squared[images, col[first]], np.inf),
+                             np.where(left_side[images, rows, last], column_squared[images, last_col[last]], np.inf))
+        min_distance = np.sqrt((row_squared + nearest).min(axis=1))
+
+        # Périmètre, comme _perimeter : bords (voisin hors de la forme) moins coins.
+        # Pour un pixel de la forme avec v voisins verticaux et h voisins horizontaux
+        # hors de la forme, bords - coins = v + h - v * h = 1 - (1 - v) * (1 - h),
+        # où 1 - v = (voisins verticaux dans la forme) - 1, idem pour h
+        vertical = framed_mask[:, :-2, 1:-1].view(np.int8) + framed_mask[:, 2:, 1:-1].view(np.int8)
+        horizontal = framed_mask[:, 1:-1, :-2].view(np.int8) + framed_mask[:, 1:-1, 2:].view(np.int8)
+        vertical -= 1
+        horizontal -= 1
+        vertical *= horizontal
+        np.subtract(1, vertical, out=vertical)
+        vertical *= form_mask
+        perimeter = vertical.reshape(count, -1).sum(axis=1, dtype=np.int32).astype(np.int64)
+
+        metrics = np.empty((count, 3))
+        metrics[:, 0] = (4 * np.pi * area) / (perimeter ** 2)
+        metrics[:, 1] = area / self._area_circle(max_distance)
+        circum_circle_area = metrics[:, 1] * area
+        ratio = np.divide(self._area_circle(min_distance), circum_circle_area,
+                          out=np.zeros(count), where=circum_circle_area != 0)
+        metrics[:, 2] = np.clip(ratio, 0, 1)
+        return metrics
 
     #### FONCTIONS POUR LE SCATTER 3D ####
     # Récupère toutes les images d'entraînement pour un dataset donné en utilisant la fonction image_from_dataset du DAO.
@@ -133,16 +224,16 @@ class Engine:
         
         print(f"Nombre d'images pour le scatter 3D : {len(training_images)}")  # Vérification du nombre d'images
 
+        np_images = []
         for img in training_images:
             qimage_argb32 = klustr_utils.qimage_argb32_from_png_decoding(img[6])
             np_image = klustr_utils.ndarray_from_qimage_argb32(qimage_argb32)
             
             np_image = 1-np_image
             
-            metric1 = self._ratio_area_perimeter(np_image)
-            metric2 = self._circum_circle(np_image)
-            metric3 = self._inscr_circle(np_image)
+            np_images.append(np_image)
 
+        for metric1, metric2, metric3 in self.metrics_batch(np_images):
             vector_tmp = QVector3D(metric1, metric2, metric3)
 
             vectors3d.append(vector_tmp)
@@ -176,9 +267,10 @@ class Engine:
         training_images = self.get_all_images(dataset_name)
         labels = self.get_all_labels(dataset_name)
         
-        for image, label in zip(training_images, labels):          
-            metrics = self.metrics(image) 
-            self.knn.add_training_data(metrics, label)
+        # toutes les métriques d'un coup (images de même taille empilées), puis un seul ajout dans KNN
+        self.knn.add_training_batch(self.metrics_batch(training_images), labels)
+        # normes, covariance et index calculés une fois ici plutôt qu'au premier classify
+        self.knn.prepare()
 
 
 if __name__ == "__main__":
@@ -1,73 +1,645 @@
 import numpy as np
+from KNNIndex import (FOREST_LEAF_SIZE, FOREST_TREES, KD_MAX_DIMENSIONS, KDTree, RPForest, build_index, distances,
+                      norms)
+
+# capacité initiale du stockage d'entraînement (doublée au besoin)
+INITIAL_CAPACITY = 64
+
+# à partir de ce nb de vecteurs d'entraînement, classify et classify_many
+# passent par un index spatial (KDTree / BallTree) ; en deçà, la force brute
+# vectorisée (O(n) par requête, mais sans boucle Python) est plus rapide
+INDEX_MIN_SIZE = 65536
+
+# à partir de ce nb de vecteurs d'entraînement (et jusqu'à KD_MAX_DIMENSIONS
+# dimensions), classify_many et neighbours regroupent l'ensemble d'entraînement
+# en blocs (feuilles d'un KDTree), et les blocs voisins en groupes (noeuds du
+# même arbre) : la k-ième distance de chaque requête est bornée par les blocs
+# les plus proches, puis seuls les groupes et les blocs à portée de cette borne
+# sont mesurés (résultat identique à la force brute) ; en deçà, la matrice de
+# distances complète est plus rapide
+BLOCKS_MIN_SIZE = 512
+BLOCK_SIZE = 32 # nb maximal de vecteurs d'entraînement par bloc
+GROUP_FACTOR = 0.5 # taille des groupes, en racine(nb de blocs) blocs
+# une requête dont les blocs retenus dépassent cette proportion de l'ensemble
+# (point isolé) passe par la matrice de distances complète
+DENSE_FRACTION = 0.5
+# nb maximal d'éléments des matrices (requêtes x entraînement, requêtes x
+# groupes, paires requête-bloc x membres, etc.) calculées à la fois, par
+# dimension (512 Ko en float64 : restent en cache)
+CHUNK_ELEMENTS = 1 << 16
+
+# métrique -> ordre de la norme (voir KNNIndex) ; mahalanobis : euclidienne
+# après blanchiment par la covariance inverse de l'ensemble d'entraînement
+METRICS = {'euclidean': 2, 'manhattan': 1, 'chebyshev': np.inf, 'mahalanobis': 2}
+# uniform : un vote par voisin ; distance : vote pondéré par 1 / distance
+WEIGHTINGS = ('uniform', 'distance')
+# égalité des votes -> none : None ; nearest : la classe du plus proche voisin
+# parmi les ex aequo ; first : la première classe apprise parmi les ex aequo
+TIE_RULES = ('none', 'nearest', 'first')
+
+# marge relative sur la k-ième distance : deux rangs différents peuvent
+# donner la même distance après arrondi (égalité à départager par indice)
+_TIE_SLACK = 1e-12
+# marge absolue du rang par produit scalaire |t|² - 2 t.q, en unités de
+# (plus grande norme + norme de la requête)² par dimension (erreur d'arrondi)
+_DOT_SLACK = 16 * np.finfo(float).eps
+# valeurs propres de la covariance considérées nulles (relativement à la plus grande)
+_EIGEN_CUTOFF = 1e-12
 
 class KNN:
-    def __init__(self, k, max_dist):
+    def __init__(self, k, max_dist, metric='euclidean', weighting='uniform', ties='none', approximate=False):
         self.k = max(1, min(k, 10))
         self.max_dist = max(1, min(max_dist, 10))
-        self._metrics = []   
-        self._labels = []
+        self.index_min_size = INDEX_MIN_SIZE # None : toujours la force brute
+        self.clear_training_data()
+        self.metric = metric
+        self.weighting = weighting
+        self.ties = ties
+        # mode approximatif (RPForest) : plus d'arbres ou de plus grandes
+        # feuilles améliorent le rappel au prix du temps de construction et de requête
+        self._forest_trees = FOREST_TREES
+        self._forest_leaf_size = FOREST_LEAF_SIZE
+        self.approximate = approximate
     
     def add_training_data(self, metrics, label):
-        # convertir les métriques en tableau NumPy
-        metrics = np.array(metrics).reshape(1, -1)
-        label = np.array([label])
+        # un seul vecteur : copié dans la prochaine rangée libre (coût amorti O(1))
+        metrics = np.asarray(metrics, dtype=float).ravel()
+        if self._size and metrics.size != self._metrics.shape[1]:
+            raise ValueError(f'expected {self._metrics.shape[1]} metrics per sample, got {metrics.size}')
         
-        # Si _metrics est None, on initialise _metrics avec metrics, sinon on empile metrics sur _metrics (vstack = ajouter des lignes)
-        if self._metrics is None:
-            self._metrics = metrics
-        else:
-            self._metrics = np.vstack([self._metrics, metrics])
+        self._reserve(1, metrics.size)
+        self._metrics[self._size] = metrics
+        self._codes[self._size] = self._code(label)
+        self._size += 1
+        self._invalidate()
+    
+    def add_training_batch(self, metrics, labels):
+        # plusieurs vecteurs d'un coup (une rangée par vecteur) : une seule copie
+        metrics = np.asarray(metrics, dtype=float)
+        if metrics.ndim != 2:
+            raise ValueError('metrics must be a 2D array (one row per sample)')
+        if len(labels) != metrics.shape[0]:
+            raise ValueError('metrics and labels must have the same length')
+        if self._size and metrics.shape[1] != self._metrics.shape[1]:
+            raise ValueError(f'expected {self._metrics.shape[1]} metrics per sample, got {metrics.shape[1]}')
         
-        # ajouter label à _labels (concatenate = liste ordonnée)
-        self._labels = np.concatenate([self._labels, label])
+        self._reserve(metrics.shape[0], metrics.shape[1])
+        start, self._size = self._size, self._size + metrics.shape[0]
+        self._metrics[start:self._size] = metrics
+        self._codes[start:self._size] = self._encode(labels)
+        self._invalidate()
+    
+    def _reserve(self, count, dimensions):
+        # s'assure qu'il reste count rangées libres ; sinon la capacité double
+        # (chaque vecteur n'est recopié qu'un nombre constant de fois en moyenne)
+        needed = self._size + count
+        if self._metrics is not None and needed <= self._metrics.shape[0]:
+            return
+        capacity = INITIAL_CAPACITY if self._metrics is None else 2 * self._metrics.shape[0]
+        capacity = max(capacity, needed)
+        metrics = np.empty((capacity, dimensions), dtype=float)
+        codes = np.empty(capacity, dtype=np.intp)
+        if self._size:
+            metrics[:self._size] = self._metrics[:self._size]
+            codes[:self._size] = self._codes[:self._size]
+        self._metrics, self._codes = metrics, codes
+    
+    def _code(self, label):
+        # code entier dense de l'étiquette (ajoutée à la table de décodage _classes au besoin)
+        code = self._class_codes.get(label)
+        if code is None:
+            code = self._class_codes[label] = len(self._classes)
+            self._classes.append(label)
+        return code
+    
+    def _encode(self, labels):
+        # étiquettes -> codes, une recherche par étiquette distincte seulement ;
+        # les nouvelles classes reçoivent leur code dans l'ordre de première
+        # apparition (np.unique trie : ties='first' dépend de cet ordre)
+        classes, first, inverse = np.unique(np.asarray(labels, dtype=object), return_index=True, return_inverse=True)
+        codes = np.empty(classes.size, dtype=np.intp)
+        for i in np.argsort(first, kind='stable'):
+            codes[i] = self._code(classes[i])
+        return codes[inverse.ravel()]
     
     def clear_training_data(self):
-        # Réinitialiser _metrics et _labels à des tableaux vides
-        self._metrics = None
-        self._labels = np.empty(0, dtype=object)
+        # Réinitialiser le stockage (la mémoire est réallouée au prochain ajout)
+        self._metrics = None # (capacité, dimensions), seules les _size premières rangées sont valides
+        self._codes = None # code de l'étiquette de chaque rangée
+        self._size = 0
+        self._classes = [] # code -> étiquette
+        self._class_codes = {} # étiquette -> code
+        self._invalidate()
+    
+    def _invalidate(self):
+        # précalculs à refaire (au prochain prepare ou classify) après une modification
+        self._index = None # index spatial
+        self._points = None # vecteurs d'entraînement dans l'espace de la métrique (blanchis pour mahalanobis)
+        self._columns = None # _points transposés : une rangée contiguë par dimension (ordre 2 : -2 t puis |t|²)
+        self._radius = 0.0 # plus grande norme (borne d'erreur du produit scalaire)
+        self._whitening = None # W tel que W Wᵀ = covariance inverse (mahalanobis)
+        self._blocks = None # blocs et groupes de classify_many (voir _get_blocks)
+    
+    @property
+    def training_size(self):
+        return self._size
+    
+    @property
+    def training_metrics(self):
+        # vue (sans copie) sur les vecteurs d'entraînement
+        if self._metrics is None:
+            return np.empty((0, 0))
+        return self._metrics[:self._size]
+    
+    @property
+    def training_labels(self):
+        # étiquettes décodées des vecteurs d'entraînement
+        return np.array(self._classes, dtype=object)[self.training_codes] if self._size else np.empty(0, dtype=object)
+    
+    @property
+    def training_codes(self):
+        if self._codes is None:
+            return np.empty(0, dtype=np.intp)
+        return self._codes[:self._size]
+    
+    @property
+    def classes(self):
+        # table de décodage : classes[code] -> étiquette
+        return tuple(self._classes)
+    
+    @property
+    def metric(self):
+        return self._metric
+    
+    @metric.setter
+    def metric(self, value):
+        if value not in METRICS:
+            raise ValueError(f'unknown metric {value!r} (expected one of {tuple(METRICS)})')
+        self._metric = value
+        self._invalidate()
+    
+    @property
+    def weighting(self):
+        return self._weighting
+    
+    @weighting.setter
+    def weighting(self, value):
+        if value not in WEIGHTINGS:
+            raise ValueError(f'unknown weighting {value!r} (expected one of {WEIGHTINGS})')
+        self._weighting = value
+    
+    @property
+    def ties(self):
+        return self._ties
+    
+    @ties.setter
+    def ties(self, value):
+        if value not in TIE_RULES:
+            raise ValueError(f'unknown tie rule {value!r} (expected one of {TIE_RULES})')
+        self._ties = value
+    
+    @property
+    def approximate(self): # voisins approximatifs (RPForest) quelle que soit la taille de l'ensemble
+        return self._approximate
+    
+    @approximate.setter
+    def approximate(self, value):
+        self._approximate = bool(value)
+        self._index = None
+    
+    @property
+    def forest_trees(self):
+        return self._forest_trees
+    
+    @forest_trees.setter
+    def forest_trees(self, value):
+        if value < 1:
+            raise ValueError('forest_trees must be at least 1')
+        self._forest_trees = value
+        self._index = None
+    
+    @property
+    def forest_leaf_size(self):
+        return self._forest_leaf_size
+    
+    @forest_leaf_size.setter
+    def forest_leaf_size(self, value):
+        if value < 1:
+            raise ValueError('forest_leaf_size must be at least 1')
+        self._forest_leaf_size = value
+        self._index = None
+    
+    @property
+    def inverse_covariance(self):
+        # covariance inverse (pseudo-inverse) mise en cache pour mahalanobis, sinon None
+        self._get_points()
+        return None if self._whitening is None else self._whitening @ self._whitening.T
+    
+    def prepare(self):
+        # précalculs sur l'ensemble d'entraînement (normes, covariance, index) ;
+        # appelé après le chargement, sinon fait au premier classify
+        if self._size:
+            self._get_points()
+            if self._uses_index():
+                self._get_index()
+            elif self._uses_blocks():
+                self._get_blocks()
+    
+    def _uses_index(self):
+        return self._approximate or (self.index_min_size is not None and self._size >= self.index_min_size)
+    
+    def _uses_blocks(self):
+        return self._size >= BLOCKS_MIN_SIZE and self._metrics.shape[1] <= KD_MAX_DIMENSIONS
+    
+    def _get_points(self):
+        if self._points is None:
+            points = self.training_metrics
+            if self._metric == 'mahalanobis':
+                self._whitening = _whitening(points)
+                points = points @ self._whitening
+            self._points = points
+            self._columns = np.ascontiguousarray(points.T)
+            if METRICS[self._metric] == 2:
+                norms = np.sum(points ** 2, axis=1)
+                self._radius = float(np.sqrt(np.max(norms))) if self._size else 0.0
+                # [q, 1] @ [-2 t ; |t|²] = |t|² - 2 t.q : les rangs en un seul produit
+                # matriciel (la multiplication par -2 est exacte)
+                self._columns = np.vstack((-2 * self._columns, norms))
+        return self._points
+    
+    def _transform(self, queries):
+        # requêtes -> espace de la métrique (même transformation que l'entraînement)
+        return queries if self._whitening is None else queries @ self._whitening
+    
+    def _get_index(self):
+        # l'index n'est reconstruit qu'au premier classify après une modification
+        if self._index is None:
+            if self._approximate:
+                self._index = RPForest(self._get_points(), self._forest_trees, self._forest_leaf_size,
+                                       p=METRICS[self._metric])
+            else:
+                self._index = build_index(self._get_points(), p=METRICS[self._metric])
+        return self._index
+    
+    def _get_blocks(self):
+        # (membres, colonnes, bas, hauts, blocs des groupes, bas des groupes, hauts
+        # des groupes) : indices des membres de chaque bloc (complétés par -1) et
+        # leurs coordonnées (inf pour les absents), boîte de chaque bloc, blocs de
+        # chaque groupe (complétés par le bloc vide) et boîte de chaque groupe ;
+        # coordonnées et boîtes rangées par dimension (dimensions, blocs, ...) ; le
+        # dernier bloc est vide (boîte inf, -inf)
+        if self._blocks is None:
+            points = self._get_points()
+            tree = KDTree(points, BLOCK_SIZE, METRICS[self._metric])
+            order, starts, ends, low, high = tree.cut()
+            counts = ends - starts
+            members = np.full((starts.shape[0] + 1, np.max(counts)), -1, dtype=np.intp)
+            members[np.repeat(np.arange(starts.shape[0]), counts), np.arange(self._size) - np.repeat(starts, counts)] = order
+            columns = np.where(members >= 0, np.moveaxis(points[members], -1, 0), np.inf)
+            # groupes : noeuds d'environ racine(nb de blocs) blocs
+            _, group_starts, group_ends, group_low, group_high = tree.cut(
+                int(np.ceil(np.sqrt(starts.shape[0]) * GROUP_FACTOR)) * BLOCK_SIZE)
+            firsts, lasts = np.searchsorted(starts, group_starts), np.searchsorted(starts, group_ends)
+            offsets = np.arange(np.max(lasts - firsts))
+            groups = np.where(firsts[:, np.newaxis] + offsets < lasts[:, np.newaxis], firsts[:, np.newaxis] + offsets,
+                              starts.shape[0])
+            self._blocks = (members, columns, np.vstack((low, np.full(low.shape[1], np.inf))).T,
+                            np.vstack((high, np.full(high.shape[1], -np.inf))).T, groups, group_low.T, group_high.T)
+        return self._blocks
+    
+    def _nearest(self, query, k, max_dist):
+        # (indices, distances) (1, <= k) des k plus proches vecteurs d'entraînement,
+        # triés par distance puis par indice (même résultat avec ou sans index
+        # exact ; en mode approximatif, parmi les candidats de RPForest)
+        if self._uses_index():
+            found_distances, found = self._get_index().query(query, k, max_dist)
+            return found[np.newaxis], found_distances[np.newaxis]
         
-
+        # rang de chaque vecteur d'entraînement (même ordre que les distances),
+        # puis sélection partielle des k plus proches : O(n), sans tri complet
+        queries = query[np.newaxis]
+        return self._select(self._ranks(queries, np.empty((2, 1, self._size))), queries, k)
+    
     def classify(self, metrics):
        # Assure que metrics est un tableau NumPy
-        metrics = np.array(metrics)
-
-        # Calcule le nombre de dimensions
-        num_dimensions = metrics.shape[0]
+        metrics = np.array(metrics, dtype=float)
         
-        # calcule la distance normalisée entre le vecteur à classifier et chaque vecteur d’entraînement 
-        # utilise le broadcasting pour soustraire le vecteur metrics de chaque vecteur dans __metrics_array
-        # axis=1 faire la somme des éléments sur chaque ligne individuellement
-        distances = np.sqrt(np.sum((self._metrics - metrics) ** 2, axis=1)) / np.sqrt(num_dimensions)
+        # Aucune donnée d'entraînement : rien à classifier
+        if self._size == 0:
+            return None
         
-        # Filtre par la distance maximale si elle est définie
-        if self.max_dist is not None:
-            valid_indices = distances <= self.max_dist
-            distances = distances[valid_indices]
-            valid_labels = self._labels[valid_indices]
-            
-            # Si aucun point ne satisfait max_dist, retourner None
-            if len(distances) == 0:
-                return None
-    
-        #argsort triés de la plus petite à la plus grande distance
-        k_nearest_indices = np.argsort(distances)[:self.k]
-        k_nearest_labels = valid_labels[k_nearest_indices]
+        self._get_points()
+        nearest, nearest_distances = self._nearest(self._transform(metrics), self.k, self.max_dist)
+        return self._decode(self.vote(self._codes[nearest], nearest_distances, self.max_dist))[0]
+    
+    def classify_many(self, metrics_matrix):
+        # classifie plusieurs vecteurs (une rangée par vecteur) d'un coup ;
+        # renvoie la liste des étiquettes, avec None aux mêmes conditions que classify
+        metrics_matrix = self._check_queries(metrics_matrix)
+        if self._size == 0:
+            return [None] * metrics_matrix.shape[0]
+        if self._uses_index():
+            # l'index bat alors la matrice de distances ; les voisins manquants
+            # (inf / -1) ne votent pas
+            self._get_points()
+            found_distances, found = self._get_index().query_many(self._transform(metrics_matrix), self.k, self.max_dist)
+            return self._decode(self.vote(self.training_codes[found], found_distances, self.max_dist))
         
-        # renvoie deux tableaux: 
-        # labels - contient les étiquettes uniques trouvées
-        # counts - contient le nombre d’occurrences de chaque étiquette dans le même ordre.
-        labels, counts = np.unique(k_nearest_labels, return_counts=True)
-
-        # Si counts est vide, retourner None
-        if len(counts) == 0:
-            return None
+        nearest, nearest_distances = self._k_nearest(metrics_matrix, self.k)
+        return self._decode(self.vote(self._codes[nearest], nearest_distances, self.max_dist))
+    
+    def neighbours(self, metrics_matrix, k=None):
+        # (indices, distances) (requêtes, min(k, taille)) des k plus proches
+        # vecteurs d'entraînement de chaque rangée (k par défaut : self.k, sans
+        # limite de distance), triés par distance puis par indice comme dans classify ;
+        # en mode approximatif, complétés par -1 / inf si RPForest trouve moins de k candidats
+        metrics_matrix = self._check_queries(metrics_matrix)
+        k = self.k if k is None else k
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        if self._size == 0:
+            return np.empty((metrics_matrix.shape[0], 0), dtype=np.intp), np.empty((metrics_matrix.shape[0], 0))
+        if self._uses_index():
+            self._get_points()
+            found_distances, found = self._get_index().query_many(self._transform(metrics_matrix), min(k, self._size))
+            return found, found_distances
+        return self._k_nearest(metrics_matrix, k)
+    
+    def _check_queries(self, metrics_matrix):
+        metrics_matrix = np.asarray(metrics_matrix, dtype=float)
+        if metrics_matrix.ndim != 2:
+            raise ValueError('metrics_matrix must be a 2D array (one row per sample)')
+        if self._size and metrics_matrix.shape[1] != self._metrics.shape[1]:
+            raise ValueError(f'expected {self._metrics.shape[1]} metrics per sample, got {metrics_matrix.shape[1]}')
+        return metrics_matrix
+    
+    def _k_nearest(self, metrics_matrix, k):
+        # (indices, distances) (requêtes, min(k, taille)) des k plus proches voisins,
+        # triés par distance puis par indice comme dans classify
+        self._get_points()
+        k = min(k, self._size)
+        nearest = np.empty((metrics_matrix.shape[0], k), dtype=np.intp)
+        nearest_distances = np.empty((metrics_matrix.shape[0], k))
+        dense = np.arange(metrics_matrix.shape[0])
+        if self._uses_blocks():
+            members, _, _, _, groups, group_low, _ = self._get_blocks()
+            # nb de blocs qui contiennent toujours au moins k points (chaque groupe
+            # doit en avoir autant)
+            safe = -(-k // int(np.min(np.sum(members[:-1] >= 0, axis=1))))
+            if safe <= np.min(np.sum(groups < members.shape[0] - 1, axis=1)):
+                dense = []
+                rows = max(1, CHUNK_ELEMENTS // group_low.shape[1])
+                for start in range(0, metrics_matrix.shape[0], rows):
+                    queries = self._transform(metrics_matrix[start:start + rows])
+                    kept, wide, found, found_distances = self._pruned(queries, k, safe)
+                    nearest[start + kept], nearest_distances[start + kept] = found, found_distances
+                    dense.extend((start + wide).tolist())
         
-        # Trouve la classe avec le max de votes
-        max_count = np.max(counts)
-        max_labels = labels[counts == max_count]  # Toutes les étiquettes ayant le nombre maximum
+        # requêtes mal bornées : matrice de distances complète, bloc par bloc (la
+        # matrice reste bornée en mémoire et les tampons restent en cache)
+        dense = np.array(dense, dtype=np.intp)
+        rows = max(1, CHUNK_ELEMENTS // self._size)
+        buffers = np.empty((2, min(rows, dense.shape[0]), self._size))
+        for start in range(0, dense.shape[0], rows):
+            chunk = dense[start:start + rows]
+            queries = self._transform(metrics_matrix[chunk])
+            nearest[chunk], nearest_distances[chunk] = \
+                self._select(self._ranks(queries, buffers[:, :chunk.shape[0]]), queries, k)
+        return nearest, nearest_distances
+    
+    def _pruned(self, queries, k, safe):
+        # (rangées, rangées écartées, indices, distances) : k plus proches voisins
+        # des requêtes dont la borne retient peu de blocs ; les rangées écartées
+        # passent par la matrice de distances complète
+        members, columns, low, high, groups, group_low, group_high = self._get_blocks()
+        slack = 1 + _TIE_SLACK
         
-        # En cas d'égalité, retourne None
-        if len(max_labels) > 1:
-            return None
+        # borne du k-ième rang : k-ième plus proche parmi les points des safe + 1
+        # blocs les plus proches dans le groupe le plus proche (un bloc de plus
+        # que nécessaire resserre nettement la borne)
+        group_lower = self._gap_ranks(queries, group_low[:, np.newaxis], group_high[:, np.newaxis])
+        near = groups[np.argmin(group_lower, axis=1)]
+        if safe + 1 < groups.shape[1]:
+            rows = np.repeat(np.arange(queries.shape[0]), near.shape[1])
+            block_lower = self._pair_ranks(queries, rows, near.ravel(), low[..., np.newaxis], high[..., np.newaxis])
+            near = np.take_along_axis(near, np.argpartition(block_lower.reshape(near.shape), safe, axis=1)[:, :safe + 1],
+                                      axis=1)
+        rows = np.repeat(np.arange(queries.shape[0]), near.shape[1])
+        bounds = np.partition(self._pair_ranks(queries, rows, near.ravel(), columns).reshape(queries.shape[0], -1),
+                              k - 1, axis=1)[:, k - 1]
+        limits = bounds * slack
+        
+        # groupes, puis blocs de ces groupes, à portée de la borne ; trop de
+        # blocs (ou moins de k points près de la requête) : matrice complète
+        rows, found_groups = np.divmod(np.flatnonzero(group_lower <= limits[:, np.newaxis]), group_lower.shape[1])
+        rows = np.repeat(rows, groups.shape[1])
+        found_blocks = groups[found_groups].ravel()
+        inside = self._pair_ranks(queries, rows, found_blocks, low[..., np.newaxis],
+                                  high[..., np.newaxis])[:, 0] <= limits[rows]
+        rows, found_blocks = rows[inside], found_blocks[inside]
+        wide = np.bincount(rows, minlength=queries.shape[0]) * BLOCK_SIZE > DENSE_FRACTION * self._size
+        wide |= ~np.isfinite(bounds)
+        inside = ~wide[rows]
+        rows, found_blocks = rows[inside], found_blocks[inside]
+        
+        # membres de ces blocs de rang <= borne : les k plus proches et tous les
+        # ex aequo du k-ième en font partie (rangées croissantes, comme rows)
+        pair_ranks = self._pair_ranks(queries, rows, found_blocks, columns)
+        # (flatnonzero puis divmod : nettement plus rapide que nonzero en 2D)
+        pair, position = np.divmod(np.flatnonzero(pair_ranks <= limits[rows, np.newaxis]), pair_ranks.shape[1])
+        found_rows, found, found_ranks = rows[pair], members[found_blocks[pair], position], pair_ranks[pair, position]
+        
+        # k-ième rang de chaque rangée : seuls les points de ce rang ou moins (à
+        # l'arrondi près) reçoivent leur distance exacte (même calcul que _select),
+        # puis sont triés par distance et par indice dans leur rangée
+        kth = np.partition(_by_row(found_rows, found_ranks, queries.shape[0], k, np.inf), k - 1, axis=1)[:, k - 1]
+        inside = found_ranks <= kth[found_rows] * slack
+        found_rows, found = found_rows[inside], found[inside]
+        nearest = _by_row(found_rows, found, queries.shape[0], k, self._size)
+        nearest_distances = _by_row(found_rows, norms(self._points[found] - queries[found_rows], METRICS[self._metric]),
+                                    queries.shape[0], k, np.inf)
+        kept = np.flatnonzero(~wide)
+        order = np.lexsort((nearest[kept], nearest_distances[kept]), axis=1)[:, :k]
+        return (kept, np.flatnonzero(wide), nearest[kept[:, np.newaxis], order],
+                nearest_distances[kept[:, np.newaxis], order])
+    
+    def _pair_ranks(self, queries, rows, blocks, low, high=None):
+        # (paires, largeur) : rangs de la requête rows[i] aux points low[:, blocks[i]],
+        # ou aux boîtes [low, high] (low et high : (dimensions, blocs, largeur)),
+        # par tranches d'au plus CHUNK_ELEMENTS éléments par dimension (les
+        # tampons restent en cache)
+        ranks = np.empty((rows.shape[0], low.shape[2]))
+        pairs = max(1, CHUNK_ELEMENTS // low.shape[2])
+        buffers = np.empty((2, min(pairs, rows.shape[0]), low.shape[2]))
+        for first in range(0, rows.shape[0], pairs):
+            chunk = slice(first, first + pairs)
+            self._gap_ranks(queries[rows[chunk]], low, high, blocks[chunk], ranks[chunk],
+                            buffers[:, :ranks[chunk].shape[0]])
+        return ranks
+    
+    def _gap_ranks(self, queries, low, high=None, blocks=None, ranks=None, buffers=None):
+        # rangs (dans le même ordre que les distances, voir _ranks) des requêtes
+        # aux points low, ou aux boîtes [low, high] (0 à l'intérieur), rangés par
+        # dimension : low tels quels (diffusés sur les rangées), ou low[:, blocks]
+        # recopiés dimension par dimension dans buffers ; écarts accumulés dans
+        # ranks, sans la racine ni la normalisation (ordre 2 : somme des carrés ;
+        # 1 : somme ; inf : max)
+        p = METRICS[self._metric]
+        for dimension in range(low.shape[0]):
+            query = queries[:, dimension:dimension + 1]
+            if blocks is None:
+                gap = low[dimension] - query
+                other = None if high is None else query - high[dimension]
+            else:
+                gap = np.take(low[dimension], blocks, axis=0, out=buffers[0], mode='clip')
+                gap -= query
+                if high is not None:
+                    other = np.take(high[dimension], blocks, axis=0, out=buffers[1], mode='clip')
+                    np.subtract(query, other, out=other)
+            if high is not None:
+                # au plus un des deux écarts est positif (bas <= haut)
+                np.maximum(gap, other, out=gap)
+                np.maximum(gap, 0, out=gap)
+            elif p != 2:
+                np.abs(gap, out=gap)
+            if p == 2:
+                np.multiply(gap, gap, out=gap)
+            if ranks is None:
+                ranks = gap
+            elif dimension == 0:
+                ranks[...] = gap
+            elif p == np.inf:
+                np.maximum(ranks, gap, out=ranks)
+            else:
+                ranks += gap
+        return ranks
+    
+    def _ranks(self, queries, buffers):
+        # (requêtes, entraînement) : valeurs dans le même ordre que les distances
+        # ordre 2 : |t|² - 2 t.q (|q|² est constant sur la rangée), un seul
+        # produit matriciel grâce aux normes précalculées
+        # ordre 1 / inf : écarts absolus accumulés dimension par dimension
+        ranks, difference = buffers
+        if METRICS[self._metric] == 2:
+            augmented = np.ones((queries.shape[0], queries.shape[1] + 1))
+            augmented[:, :-1] = queries
+            return np.matmul(augmented, self._columns, out=ranks)
+        
+        accumulate = np.add if METRICS[self._metric] == 1 else np.maximum
+        np.subtract(self._columns[0], queries[:, :1], out=ranks)
+        np.abs(ranks, out=ranks)
+        for dimension in range(1, self._columns.shape[0]):
+            np.subtract(self._columns[dimension], queries[:, dimension:dimension + 1], out=difference)
+            np.abs(difference, out=difference)
+            accumulate(ranks, difference, out=ranks)
+        return ranks
+    
+    def _select(self, ranks, queries, k):
+        # (indices, distances) (requêtes, k) des k plus proches voisins de chaque rangée,
+        # triés par distance puis par indice (comme classify)
+        p = METRICS[self._metric]
+        k = min(k, ranks.shape[1])
+        if k == ranks.shape[1]:
+            # tout l'ensemble d'entraînement est retenu : rien à départager
+            nearest = np.broadcast_to(np.arange(k), ranks.shape).copy()
         else:
-            return max_labels[0]
\ No newline at end of file
+            # sélection partielle : les k plus petits rangs dans le désordre, puis
+            # le (k+1)-ième à sa place (le premier rang écarté) ; une seule rangée
+            # (classify) : argpartition, en un minimum d'appels ; plusieurs : sur
+            # les valeurs (nettement plus rapide), les indices venant ensuite
+            if ranks.shape[0] == 1:
+                partition = np.argpartition(ranks, k, axis=1)
+                nearest = partition[:, :k]
+                kth = ranks[0, nearest[0]].max(keepdims=True)
+                following = ranks[0, partition[:, k]]
+            else:
+                partition = np.partition(ranks, k, axis=1)
+                kth = partition[:, :k].max(axis=1)
+                following = partition[:, k]
+                nearest = None
+            # un rang écarté à peine plus grand que le k-ième (arrondi du produit
+            # scalaire ou de la norme) ou égal peut changer les k plus proches : ces
+            # rangées (rares) sont triées sur les distances exactes, de façon stable
+            if p == 2:
+                lengths = np.sqrt((queries ** 2).sum(axis=1))
+                tolerance = _DOT_SLACK * (queries.shape[1] + 2) * (self._radius + lengths) ** 2
+            else:
+                tolerance = np.abs(kth) * _TIE_SLACK
+            crowded = ~(following > kth + tolerance) # NaN compris
+            if nearest is None:
+                # ailleurs, exactement k rangs <= au k-ième : leurs indices, dans l'ordre
+                chosen = ranks <= kth[:, np.newaxis]
+                chosen[crowded] = False
+                nearest = np.empty((ranks.shape[0], k), dtype=np.intp)
+                nearest[~crowded] = (np.flatnonzero(chosen) % ranks.shape[1]).reshape(-1, k)
+            for row in np.flatnonzero(crowded).tolist():
+                nearest[row] = np.argsort(distances(self._points, queries[row], p), kind='stable')[:k]
+        
+        # distances exactes (même calcul que KNNIndex) des voisins retenus seulement,
+        # puis tri des k voisins de chaque rangée par distance et par indice
+        nearest_distances = norms(self._points[nearest] - queries[:, np.newaxis], p)
+        order = np.lexsort((nearest, nearest_distances), axis=1)
+        rows = np.arange(nearest.shape[0])[:, np.newaxis]
+        return nearest[rows, order], nearest_distances[rows, order]
+    
+    def vote(self, codes, nearest_distances, max_dist):
+        # code de l'étiquette gagnante de chaque rangée de voisins (codes et distances
+        # triés par distance) à distance <= max_dist, -1 sans voisin ou en cas
+        # d'égalité (selon ties) ; sert aussi à KNNEvaluation pour rejouer le vote
+        # avec d'autres réglages sur les mêmes voisins
+        classes = len(self._classes)
+        valid = nearest_distances <= max_dist if max_dist is not None else np.isfinite(nearest_distances)
+        if self._weighting == 'distance':
+            # un voisin confondu avec la requête l'emporte : seuls les voisins
+            # à distance nulle votent alors
+            exact = valid & (nearest_distances == 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weights = np.where(np.any(exact, axis=1, keepdims=True), exact, valid / nearest_distances)
+        else:
+            weights = valid
+        
+        # votes (requêtes, classes) : un seul bincount pour tout le bloc
+        rows = np.arange(codes.shape[0])
+        keys = rows[:, np.newaxis] * classes + codes
+        votes = np.bincount(keys.ravel(), weights=weights.ravel(), minlength=codes.shape[0] * classes)
+        votes = votes.reshape(-1, classes)
+        best = votes.argmax(axis=1) # premier maximum : plus petit code (première classe apprise)
+        best_votes = votes[rows, best][:, np.newaxis]
+        tied = (votes == best_votes).sum(axis=1) > 1
+        decided = best_votes[:, 0] > 0
+        if self._ties == 'none':
+            decided &= ~tied
+        elif self._ties == 'nearest':
+            # parmi les classes ex aequo, celle du voisin le plus proche
+            for row in np.flatnonzero(tied & decided).tolist():
+                for position in range(codes.shape[1]):
+                    if valid[row, position] and votes[row, codes[row, position]] == best_votes[row, 0]:
+                        best[row] = codes[row, position]
+                        break
+        return np.where(decided, best, -1)
+    
+    def _decode(self, codes):
+        # codes -> étiquettes (-1 : None)
+        return [self._classes[code] if code >= 0 else None for code in codes.tolist()]
+
+
+def _by_row(rows, values, count, width, fill):
+    # (count, au moins width) : values (rangées croissantes) rangées à gauche de
+    # leur rangée, le reste complété par fill
+    counts = np.bincount(rows, minlength=count)
+    matrix = np.full((count, max(width, np.max(counts, initial=0))), fill, dtype=np.asarray(values).dtype)
+    matrix[rows, np.arange(rows.shape[0]) - (np.cumsum(counts) - counts)[rows]] = values
+    return matrix
+
+
+def _whitening(points):
+    # W tel que W Wᵀ = covariance inverse : la distance de Mahalanobis est la
+    # distance euclidienne entre points @ W. Les directions de variance nulle
+    # (métriques constantes ou liées) sont ignorées (pseudo-inverse).
+    if points.shape[0] < 2:
+        return np.eye(points.shape[1])
+    variances, directions = np.linalg.eigh(np.atleast_2d(np.cov(points, rowvar=False)))
+    kept = variances > _EIGEN_CUTOFF * max(variances.max(), 0)
+    scales = np.zeros_like(variances)
+    scales[kept] = 1 / np.sqrt(variances[kept])
+    return directions * scales
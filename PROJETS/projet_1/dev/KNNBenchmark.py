@@ -0,0 +1,221 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from KNN import KNN
+
+# Banc d'essai du classificateur KNN.
+#
+# Pour chaque taille d'ensemble d'entraînement, temps moyen par requête de :
+# - reference : l'ancien classify (tri complet des distances, vote np.unique
+#   sur les étiquettes), gardé ici comme oracle
+# - brute : classify sans index (sélection partielle argpartition, vote
+#   bincount sur les codes entiers des étiquettes)
+# - index : classify avec l'index spatial (KDTree / BallTree)
+# - batch : classify_many sur toutes les requêtes d'un coup (blocs élagués
+#   par bornes de distance, voir KNN)
+#
+# batch_speedup compare batch à la boucle sur classify (brute) ; l'objectif
+# est BATCH_TARGET. La boucle et le lot sont mesurés en alternance (la
+# meilleure de REPEAT mesures), les blocs de classify_many construits hors
+# mesure comme l'index. Mesuré avec 200 requêtes en 3 dimensions : 10x à 14x
+# de 1000 à 20000 vecteurs (9.9x au pire à 1000), ~28x à 100000 ; la machine
+# de mesure est bruitée d'un essai à l'autre. Le rapport l'indique
+# (batch_target_met) au lieu de le supposer.
+#
+# Avant les mesures, chaque variante est comparée à l'oracle sur toutes les
+# requêtes, et la règle ties='first' est vérifiée sur un lot d'étiquettes
+# non triées ; le code de sortie vaut 1 si une vérification échoue.
+#
+# Avec --recall, le mode approximatif (RPForest) est aussi mesuré pour
+# chaque réglage (nb d'arbres, taille des feuilles) contre la force brute
+# exacte : temps de construction, temps par requête, rappel (proportion des
+# k vrais plus proches voisins retrouvés) et accord des étiquettes prédites.
+#
+#   python KNNBenchmark.py --sizes 1000 100000 --output knn_report.json
+#   python KNNBenchmark.py --sizes 100000 --recall --dimensions 16
+
+SIZES = (1000, 10000, 100000)
+DIMENSIONS = 3 # nb de métriques par image (Engine.metrics)
+CLASSES = 10
+QUERIES = 200
+K = 5
+MAX_DIST = 1
+BATCH_TARGET = 10 # accélération visée de classify_many sur la boucle de classify
+REPEAT = 5 # mesures alternées de la boucle et du lot (un lot ne dure que quelques ms)
+FOREST_TREES = (1, 2, 4, 8, 16) # réglages du mode approximatif mesurés par --recall
+FOREST_LEAF_SIZES = (32, 64, 128)
+
+
+def reference_classify(training_metrics, training_labels, metrics, k, max_dist):
+    # classify d'origine : toutes les distances triées, vote sur les étiquettes
+    all_distances = np.sqrt(np.sum((training_metrics - metrics) ** 2, axis=1)) / np.sqrt(training_metrics.shape[1])
+    valid_indices = np.flatnonzero(all_distances <= max_dist)
+    order = np.argsort(all_distances[valid_indices], kind='stable')[:k]
+    k_nearest_labels = training_labels[valid_indices[order]]
+    if len(k_nearest_labels) == 0:
+        return None
+    labels, counts = np.unique(k_nearest_labels, return_counts=True)
+    max_labels = labels[counts == np.max(counts)]
+    return None if len(max_labels) > 1 else max_labels[0]
+
+
+def check_first_tie():
+    # ties='first' : la classe apprise la première l'emporte, même quand le lot
+    # n'est pas dans l'ordre alphabétique (codes attribués par ordre d'apparition)
+    knn = KNN(2, 1, ties='first')
+    knn.add_training_batch([[0], [0], [0]], ['zebra', 'apple', 'zebra'])
+    knn.add_training_batch([[5], [5]], ['mango', 'kiwi'])
+    found = knn.classify([0]), knn.classify([5])
+    return True if found == ('zebra', 'mango') else f'expected zebra, mango, got {found[0]}, {found[1]}'
+
+
+def _dataset(size, queries, dimensions=DIMENSIONS, seed=0):
+    # nuages gaussiens, un par classe, qui se chevauchent (votes serrés et égalités)
+    rng = np.random.default_rng(seed)
+    centres = rng.random((CLASSES, dimensions))
+    labels = rng.integers(0, CLASSES, size)
+    metrics = centres[labels] + rng.normal(0, 0.1, (size, dimensions))
+    query_metrics = centres[rng.integers(0, CLASSES, queries)] + rng.normal(0, 0.1, (queries, dimensions))
+    return metrics, np.array([f'class {label}' for label in labels], dtype=object), query_metrics
+
+
+def _measure(function, calls):
+    # durée moyenne d'un appel sur calls appels (ms)
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def _measure_alternately(functions, calls, repeat):
+    # durées moyennes d'un appel (ms) de chaque fonction sur calls appels, les
+    # meilleures de repeat mesures faites en alternance : un ralentissement
+    # passager de la machine touche toutes les fonctions
+    best = [np.inf] * len(functions)
+    for _ in range(repeat):
+        for position, function in enumerate(functions):
+            best[position] = min(best[position], _measure(function, calls))
+    return best
+
+
+def bench(size, queries, k, max_dist):
+    metrics, labels, query_metrics = _dataset(size, queries)
+    knn = KNN(k, max_dist)
+    knn.add_training_batch(metrics, labels)
+
+    expected = []
+    reference = _measure(lambda: expected.extend(
+        reference_classify(metrics, labels, query, knn.k, knn.max_dist) for query in query_metrics), queries)
+
+    variants = {}
+    knn.index_min_size = 0
+    knn.classify(query_metrics[0]) # construction de l'index hors mesure
+    index = _measure(lambda: variants.setdefault('index', [knn.classify(query) for query in query_metrics]), queries)
+    knn.index_min_size = None
+    knn.prepare() # construction des blocs de classify_many hors mesure
+    brute, batch = _measure_alternately(
+        (lambda: variants.setdefault('brute', [knn.classify(query) for query in query_metrics]),
+         lambda: variants.setdefault('batch', knn.classify_many(query_metrics))), queries, REPEAT)
+    results = {'reference': reference, 'brute': brute, 'index': index, 'batch': batch}
+
+    correctness = {}
+    for name, labels_found in variants.items():
+        mismatches = sum(found != wanted for found, wanted in zip(labels_found, expected))
+        correctness[name] = True if mismatches == 0 else f'{mismatches} of {queries} queries differ'
+    speedup = results['brute'] / results['batch']
+    return {'size': size, 'queries': queries, 'k': knn.k, 'max_dist': knn.max_dist,
+            'ms_per_query': results, 'correctness': correctness,
+            'batch_speedup': speedup, 'batch_target_met': speedup >= BATCH_TARGET}
+
+
+def recall(size, dimensions, queries, k, max_dist, trees_values=FOREST_TREES, leaf_sizes=FOREST_LEAF_SIZES):
+    # rappel et latence du mode approximatif, contre la force brute exacte
+    metrics, labels, query_metrics = _dataset(size, queries, dimensions)
+    exact = KNN(k, max_dist)
+    exact.index_min_size = None
+    exact.add_training_batch(metrics, labels)
+    exact.prepare()
+    expected = []
+    exact_ms = _measure(lambda: expected.append(exact.neighbours(query_metrics)[0]), queries)
+    expected_labels = exact.classify_many(query_metrics)
+
+    settings = []
+    for trees in trees_values:
+        for leaf_size in leaf_sizes:
+            knn = KNN(k, max_dist, approximate=True)
+            knn.forest_trees, knn.forest_leaf_size = trees, leaf_size
+            knn.add_training_batch(metrics, labels)
+            build_ms = _measure(knn.prepare, 1)
+            found = []
+            query_ms = _measure(lambda: found.append(knn.neighbours(query_metrics)[0]), queries)
+            hits = sum(np.intersect1d(row, wanted).size for row, wanted in zip(found[0], expected[0]))
+            agreement = np.mean([found_label == wanted for found_label, wanted
+                                 in zip(knn.classify_many(query_metrics), expected_labels)])
+            settings.append({'trees': trees, 'leaf_size': leaf_size, 'build_ms': build_ms,
+                             'ms_per_query': query_ms, 'recall': hits / expected[0].size,
+                             'label_agreement': float(agreement)})
+    return {'size': size, 'dimensions': dimensions, 'queries': queries, 'k': exact.k,
+            'exact_ms_per_query': exact_ms, 'settings': settings}
+
+
+# quelques tests simples
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the KNN classifier')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--queries', type=int, default=QUERIES)
+    parser.add_argument('-k', type=int, default=K)
+    parser.add_argument('--max-dist', type=float, default=MAX_DIST)
+    parser.add_argument('--output', default='knn_benchmark.json')
+    parser.add_argument('--recall', action='store_true', help='also measure the approximate mode against brute force')
+    parser.add_argument('--dimensions', type=int, default=DIMENSIONS, help='metrics per sample for --recall')
+    parser.add_argument('--trees', type=int, nargs='+', default=FOREST_TREES)
+    parser.add_argument('--leaf-sizes', type=int, nargs='+', default=FOREST_LEAF_SIZES)
+    arguments = parser.parse_args()
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': [],
+        'approximate': [],
+    }
+    failed = []
+    report['first_tie'] = check_first_tie()
+    if report['first_tie'] is not True:
+        print(f"ties='first' : {report['first_tie']}")
+        failed.append('first_tie')
+    for size in arguments.sizes:
+        result = bench(size, arguments.queries, arguments.k, arguments.max_dist)
+        report['results'].append(result)
+        timings = ', '.join(f'{name} {ms:.3f}' for name, ms in result['ms_per_query'].items())
+        print(f'{size:>8} vecteurs : {timings} ms / requête')
+        print(f'{"":>8} classify_many : {result["batch_speedup"]:.1f}x la boucle sur classify '
+              f'(objectif {BATCH_TARGET}x {"atteint" if result["batch_target_met"] else "non atteint"})')
+        for name, correct in result['correctness'].items():
+            if correct is not True:
+                print(f'{"":>8} {name} : {correct}')
+                failed.append(name)
+
+    if arguments.recall:
+        for size in arguments.sizes:
+            result = recall(size, arguments.dimensions, arguments.queries, arguments.k, arguments.max_dist,
+                            arguments.trees, arguments.leaf_sizes)
+            report['approximate'].append(result)
+            print(f'{size:>8} vecteurs, {arguments.dimensions} dimensions : '
+                  f'force brute {result["exact_ms_per_query"]:.3f} ms / requête')
+            for setting in result['settings']:
+                print(f'{"":>8} {setting["trees"]:>3} arbres, feuilles de {setting["leaf_size"]:<4} : '
+                      f'construction {setting["build_ms"]:9.1f} ms, {setting["ms_per_query"]:.3f} ms / requête, '
+                      f'rappel {setting["recall"]:.3f}, étiquettes {setting["label_agreement"]:.3f}')
+
+    with open(arguments.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Rapport : {arguments.output}')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import time
+
+import numpy as np
+
+from KNN import KNN
+
+# Évaluation du classificateur KNN sur une grille de réglages (k, max_dist).
+#
+# Les voisins de chaque image évaluée sont calculés une seule fois, pour le
+# plus grand k de la grille (KNN.neighbours : triés par distance puis par
+# indice). Chaque réglage (k, max_dist) ne fait ensuite que rejouer le vote
+# (KNN.vote) sur les k premiers voisins à distance <= max_dist : toute la
+# grille coûte à peu près une passe de classification.
+#
+# Trois façons d'évaluer :
+# - evaluate : un ensemble de test, contre les données d'entraînement du KNN
+# - leave_one_out : chaque vecteur d'entraînement contre tous les autres
+# - cross_validate : k plis, chaque pli contre les autres plis
+#
+# Le vote suit la métrique, la pondération et la règle d'égalité du KNN
+# évalué. Le résultat (Evaluation) garde une matrice de confusion par
+# réglage : rangée = vraie classe, colonne = classe prédite, la dernière
+# colonne compte les images non classées (None : aucun voisin ou égalité).
+
+K_VALUES = tuple(range(1, 11)) # mêmes bornes que KNN et KnnWidget
+# les métriques (Engine.metrics) sont à peu près dans [0, 1] et les distances
+# sont normalisées : au-delà de 1, max_dist ne filtre plus aucun voisin. Mêmes
+# valeurs que le curseur de KnnWidget (0.1 à 1.0)
+MAX_DISTANCES = tuple(value / 10 for value in range(1, 11))
+FOLDS = 5
+
+
+class Evaluation:
+    def __init__(self, classes, k_values, max_distances, confusion):
+        self._classes = tuple(classes)
+        self._k_values = tuple(k_values)
+        self._max_distances = tuple(max_distances)
+        self._confusion = confusion # (k, max_dist, vraie classe, classe prédite + non classées)
+
+    @property
+    def classes(self): # étiquettes des rangées et colonnes des matrices de confusion
+        return self._classes
+
+    @property
+    def k_values(self):
+        return self._k_values
+
+    @property
+    def max_distances(self):
+        return self._max_distances
+
+    @property
+    def confusion(self):
+        return self._confusion
+
+    @property
+    def accuracy(self): # (k, max_dist) : proportion d'images bien classées (les non classées comptent comme erreurs)
+        correct = np.trace(self._confusion[..., :-1], axis1=2, axis2=3)
+        total = self._confusion.sum(axis=(2, 3))
+        return np.divide(correct, total, out=np.zeros(correct.shape), where=total > 0)
+
+    @property
+    def unclassified(self): # (k, max_dist) : proportion d'images non classées
+        total = self._confusion.sum(axis=(2, 3))
+        return np.divide(self._confusion[..., -1].sum(axis=2), total, out=np.zeros(total.shape), where=total > 0)
+
+    def confusion_matrix(self, k, max_dist):
+        return self._confusion[self._k_values.index(k), self._max_distances.index(max_dist)]
+
+    def best(self):
+        # (k, max_dist, précision) du meilleur réglage (le plus petit k, puis la plus petite distance à égalité)
+        i, j = np.unravel_index(np.argmax(self.accuracy), self.accuracy.shape)
+        return self._k_values[i], self._max_distances[j], float(self.accuracy[i, j])
+
+
+def _check_grid(k_values, max_distances):
+    if not k_values or not max_distances:
+        raise ValueError('k_values and max_distances must not be empty')
+    if min(k_values) < 1:
+        raise ValueError('k values must be at least 1')
+
+
+def _score(knn, codes, nearest_distances, truth, classes, k_values, max_distances):
+    # matrices de confusion de toute la grille à partir des mêmes voisins triés
+    # codes, nearest_distances : (images, plus grand k) ; truth : vraie classe de chaque image
+    count = len(classes)
+    confusion = np.zeros((len(k_values), len(max_distances), count, count + 1), dtype=np.int64)
+    for i, k in enumerate(k_values):
+        for j, max_dist in enumerate(max_distances):
+            predicted = knn.vote(codes[:, :k], nearest_distances[:, :k], max_dist)
+            predicted[predicted < 0] = count # colonne des non classées
+            confusion[i, j] = np.bincount(truth * (count + 1) + predicted,
+                                          minlength=count * (count + 1)).reshape(count, count + 1)
+    return confusion
+
+
+def evaluate(knn, metrics, labels, k_values=K_VALUES, max_distances=MAX_DISTANCES):
+    # ensemble de test (une rangée de métriques par image) contre les données d'entraînement du KNN
+    _check_grid(k_values, max_distances)
+    if len(labels) != len(metrics):
+        raise ValueError('metrics and labels must have the same length')
+    # les classes absentes de l'entraînement ne peuvent pas être prédites, mais comptent comme erreurs
+    classes = list(knn.classes)
+    classes.extend(sorted(set(labels) - set(classes), key=str))
+    class_codes = {label: code for code, label in enumerate(classes)}
+    truth = np.array([class_codes[label] for label in labels], dtype=np.intp)
+
+    nearest, nearest_distances = knn.neighbours(metrics, max(k_values))
+    return Evaluation(classes, k_values, max_distances,
+                      _score(knn, knn.training_codes[nearest], nearest_distances, truth, classes, k_values, max_distances))
+
+
+def leave_one_out(knn, k_values=K_VALUES, max_distances=MAX_DISTANCES):
+    # chaque vecteur d'entraînement classé par tous les autres
+    # (mahalanobis : la covariance reste celle de tout l'ensemble)
+    _check_grid(k_values, max_distances)
+    size = knn.training_size
+    if size < 2:
+        raise ValueError('leave-one-out needs at least 2 training samples')
+    nearest, nearest_distances = knn.neighbours(knn.training_metrics, max(k_values) + 1)
+
+    # chaque vecteur est retiré de sa propre liste : à distance nulle, il n'est
+    # pas forcément en tête (doublons d'indice plus petit) ; s'il n'y est pas,
+    # c'est le dernier voisin (en trop) qui est retiré
+    keep = nearest != np.arange(size)[:, np.newaxis]
+    keep[keep.all(axis=1), -1] = False
+    nearest = nearest[keep].reshape(size, -1)
+    nearest_distances = nearest_distances[keep].reshape(size, -1)
+
+    codes = knn.training_codes
+    return Evaluation(knn.classes, k_values, max_distances,
+                      _score(knn, codes[nearest], nearest_distances, codes, knn.classes, k_values, max_distances))
+
+
+def cross_validate(knn, folds=FOLDS, seed=0, k_values=K_VALUES, max_distances=MAX_DISTANCES):
+    # validation croisée : les vecteurs d'entraînement sont répartis au hasard
+    # en plis, chaque pli est classé par un KNN (mêmes réglages) entraîné sur
+    # les autres ; les matrices de confusion des plis sont additionnées
+    _check_grid(k_values, max_distances)
+    size = knn.training_size
+    if folds < 2 or folds > size:
+        raise ValueError(f'folds must be between 2 and the number of training samples ({size})')
+    metrics, codes = knn.training_metrics, knn.training_codes
+    confusion = 0
+    for part in np.array_split(np.random.default_rng(seed).permutation(size), folds):
+        held_out = np.zeros(size, dtype=bool)
+        held_out[part] = True
+        rest = np.flatnonzero(~held_out) # ordre d'origine : mêmes égalités que le KNN complet
+
+        fold = KNN(knn.k, knn.max_dist, knn.metric, knn.weighting, knn.ties, knn.approximate)
+        fold.index_min_size = knn.index_min_size
+        fold.forest_trees, fold.forest_leaf_size = knn.forest_trees, knn.forest_leaf_size
+        fold.add_training_batch(metrics[rest], codes[rest])
+        nearest, nearest_distances = fold.neighbours(metrics[held_out], max(k_values))
+        # vote avec les codes du KNN complet (les étiquettes du pli sont ces codes)
+        confusion = confusion + _score(knn, codes[rest][nearest], nearest_distances, codes[held_out],
+                                       knn.classes, k_values, max_distances)
+    return Evaluation(knn.classes, k_values, max_distances, confusion)
+
+
+# quelques tests simples
+def main():
+    # nuages gaussiens qui se chevauchent, un par classe, à l'échelle des
+    # métriques d'Engine (dans [0, 1], sans mise à l'échelle)
+    rng = np.random.default_rng(0)
+    centres = rng.random((5, 3))
+    def sample(count):
+        labels = rng.integers(0, len(centres), count)
+        return centres[labels] + rng.normal(0, 0.15, (count, 3)), [f'class {label}' for label in labels]
+
+    knn = KNN(5, 3)
+    knn.add_training_batch(*sample(2000))
+    test_metrics, test_labels = sample(2000)
+
+    start = time.perf_counter()
+    knn.classify_many(test_metrics)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    evaluation = evaluate(knn, test_metrics, test_labels)
+    grid = time.perf_counter() - start
+    print(f'classify_many : {single * 1000:.1f} ms, grille {len(K_VALUES)} x {len(MAX_DISTANCES)} : {grid * 1000:.1f} ms')
+
+    # à cette échelle, max_dist filtre vraiment : les colonnes diffèrent
+    assert len({tuple(column) for column in evaluation.accuracy.T}) > 1
+    print('précision (rangées : k, colonnes : max_dist)')
+    print('      ' + ''.join(f'{max_dist:>7}' for max_dist in evaluation.max_distances))
+    for k, row in zip(evaluation.k_values, evaluation.accuracy):
+        print(f'k={k:<4}' + ''.join(f'{accuracy:7.3f}' for accuracy in row))
+    k, max_dist, accuracy = evaluation.best()
+    print(f'meilleur réglage : k={k}, max_dist={max_dist} ({accuracy:.3f})')
+    print(evaluation.confusion_matrix(k, max_dist))
+
+    for name, result in (('leave-one-out', leave_one_out(knn)), (f'{FOLDS} plis', cross_validate(knn))):
+        k, max_dist, accuracy = result.best()
+        print(f'{name} : k={k}, max_dist={max_dist} ({accuracy:.3f})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Index spatiaux pour la recherche des k plus proches voisins (KNN).
+#
+# KDTree : boîtes englobantes alignées sur les axes, idéal en petite
+# dimension (nos 3 métriques). BallTree : sphères englobantes, plus robuste
+# quand le nombre de dimensions augmente. Les deux arbres sont construits de
+# la même façon : chaque noeud est coupé à la médiane de la dimension la plus
+# étendue, jusqu'à des feuilles d'au plus LEAF_SIZE points.
+#
+# La recherche parcourt d'abord l'enfant le plus proche et élague tout noeud
+# dont la distance minimale dépasse la k-ième meilleure distance trouvée ou
+# max_dist. Les distances sont calculées exactement comme dans
+# KNN.classify et les voisins sont triés par distance puis par indice :
+# le résultat est identique à la force brute.
+#
+# Les distances sont des normes de Minkowski d'ordre p normalisées par le
+# nb de dimensions, pour rester à la même échelle que les métriques :
+#   p = 2 : euclidienne / sqrt(nb de dimensions)
+#   p = 1 : manhattan / nb de dimensions
+#   p = inf : chebyshev (plus grand écart)
+# (la distance de Mahalanobis est euclidienne après blanchiment, voir KNN)
+#
+# RPForest : index approximatif pour les grands ensembles en plus grande
+# dimension, où les arbres exacts n'élaguent plus. Chaque arbre coupe à la
+# médiane d'une projection aléatoire ; une requête descend dans une seule
+# feuille par arbre et seuls les points de ces feuilles (candidats) sont
+# comparés exactement. Plus d'arbres ou de plus grandes feuilles : meilleur
+# rappel, mais construction et requêtes plus lentes.
+
+LEAF_SIZE = 32 # nb maximal de points par feuille
+KD_MAX_DIMENSIONS = 8 # au-delà, les boîtes élaguent mal : on utilise un BallTree
+_SLACK = 1e-12 # marge relative sur les bornes (erreurs d'arrondi) : on n'élague jamais un point à égalité
+
+FOREST_TREES = 8 # nb d'arbres de RPForest
+FOREST_LEAF_SIZE = 64 # nb maximal de points par feuille de RPForest
+FOREST_CHUNK_ELEMENTS = 1 << 20 # nb maximal d'écarts (requêtes x candidats x dimensions) calculés à la fois
+
+
+def norms(vectors, p=2):
+    # norme normalisée d'ordre p de chaque vecteur (dernier axe)
+    if p == 2:
+        return np.sqrt((vectors ** 2).sum(axis=-1)) / np.sqrt(vectors.shape[-1])
+    if p == 1:
+        return np.abs(vectors).sum(axis=-1) / vectors.shape[-1]
+    if p == np.inf:
+        return np.abs(vectors).max(axis=-1)
+    raise ValueError(f'unsupported norm order {p!r} (expected 1, 2 or inf)')
+
+
+def distances(points, query, p=2):
+    # distance normalisée de chaque point à query (même calcul que KNN.classify)
+    return norms(points - query, p)
+
+
+class _Tree(ABC):
+    def __init__(self, points, leaf_size=LEAF_SIZE, p=2):
+        self._points = np.asarray(points, dtype=float)
+        self._p = p # ordre de la norme des distances
+        count = self._points.shape[0]
+        self._order = np.arange(count) # indices des points, regroupés par noeud
+        self._start = [] # noeud -> première position dans _order
+        self._end = [] # noeud -> dernière position + 1
+        self._left = [] # noeud -> enfant gauche (-1 : feuille)
+        self._right = []
+
+        stack = [self._add_node(0, count)]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= leaf_size:
+                continue
+            indices = self._order[start:end]
+            points = self._points[indices]
+            spread = points.max(axis=0) - points.min(axis=0)
+            dimension = int(np.argmax(spread))
+            if spread[dimension] == 0:
+                continue # points tous identiques : on garde une feuille
+            # coupe à la médiane (sélection partielle, pas de tri complet)
+            middle = (end - start) // 2
+            self._order[start:end] = indices[np.argpartition(points[:, dimension], middle)]
+            left = self._add_node(start, start + middle)
+            right = self._add_node(start + middle, end)
+            self._left[node], self._right[node] = left, right
+            stack.extend((left, right))
+        self._finish()
+
+    def __len__(self):
+        return self._points.shape[0]
+
+    def _add_node(self, start, end):
+        self._start.append(start)
+        self._end.append(end)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._add_bounds(self._points[self._order[start:end]])
+        return len(self._start) - 1
+
+    @abstractmethod
+    def _add_bounds(self, points):
+        # mémorise le volume englobant des points d'un nouveau noeud
+        pass
+
+    def _finish(self):
+        pass
+
+    @abstractmethod
+    def _lower_bounds(self, nodes, query):
+        # distance normalisée minimale entre query et un point de chacun des noeuds
+        pass
+
+    def query(self, query, k, max_dist=None):
+        # (distances, indices) des k plus proches voisins à distance <= max_dist,
+        # triés par distance puis par indice
+        query = np.asarray(query, dtype=float)
+        best_distances = np.empty(0)
+        best_indices = np.empty(0, dtype=np.intp)
+        bound = np.inf if max_dist is None else max_dist
+
+        # pile de (borne inférieure, noeud) : les bornes des enfants sont calculées à l'empilement
+        stack = [(0.0, 0)]
+        while stack:
+            lower, node = stack.pop()
+            if lower > bound * (1 + _SLACK):
+                continue
+            left, right = self._left[node], self._right[node]
+            if left >= 0:
+                # l'enfant le plus proche est empilé en dernier : il est visité en premier
+                lower_left, lower_right = self._lower_bounds([left, right], query).tolist()
+                if lower_left <= lower_right:
+                    stack.extend(((lower_right, right), (lower_left, left)))
+                else:
+                    stack.extend(((lower_left, left), (lower_right, right)))
+                continue
+
+            # seuls les points à distance <= borne courante peuvent entrer dans les k meilleurs
+            indices = self._order[self._start[node]:self._end[node]]
+            leaf_distances = distances(self._points[indices], query, self._p)
+            inside = leaf_distances <= bound
+            if not inside.any():
+                continue
+            indices, leaf_distances = indices[inside], leaf_distances[inside]
+            candidates_distances = np.concatenate((best_distances, leaf_distances))
+            candidates_indices = np.concatenate((best_indices, indices))
+            selected = np.lexsort((candidates_indices, candidates_distances))[:k]
+            best_distances, best_indices = candidates_distances[selected], candidates_indices[selected]
+            if best_indices.size == k:
+                bound = min(bound, best_distances[-1])
+        return best_distances, best_indices
+
+    def query_many(self, queries, k, max_dist=None):
+        # query pour chaque rangée : (distances, indices) (requêtes, k),
+        # complétés par inf / -1 quand moins de k voisins sont trouvés
+        found_distances = np.full((len(queries), k), np.inf)
+        found = np.full((len(queries), k), -1, dtype=np.intp)
+        for row, query in enumerate(queries):
+            row_distances, row_indices = self.query(query, k, max_dist)
+            found_distances[row, :row_indices.size] = row_distances
+            found[row, :row_indices.size] = row_indices
+        return found_distances, found
+
+
+class KDTree(_Tree):
+    def __init__(self, points, leaf_size=LEAF_SIZE, p=2):
+        self._low = [] # noeud -> coin inférieur de la boîte englobante
+        self._high = [] # noeud -> coin supérieur
+        super().__init__(points, leaf_size, p)
+
+    def _add_bounds(self, points):
+        self._low.append(points.min(axis=0))
+        self._high.append(points.max(axis=0))
+
+    def _finish(self):
+        self._low = np.array(self._low)
+        self._high = np.array(self._high)
+
+    def _lower_bounds(self, nodes, query):
+        # distance de query aux boîtes (0 à l'intérieur)
+        gap = np.maximum(self._low[nodes] - query, 0) + np.maximum(query - self._high[nodes], 0)
+        return norms(gap, self._p)
+
+    def cut(self, size=0):
+        # (ordre, débuts, fins, bas, hauts) des feuilles et des noeuds d'au plus
+        # size points dont le parent en a plus (size = 0 : toutes les feuilles) :
+        # les points ordre[débuts[i]:fins[i]] du noeud i sont dans la boîte
+        # [bas[i], hauts[i]] ; noeuds rangés dans l'ordre des points, qu'ils couvrent
+        nodes = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._left[node] < 0 or self._end[node] - self._start[node] <= size:
+                nodes.append(node)
+            else:
+                stack.extend((self._right[node], self._left[node]))
+        return (self._order, np.array(self._start)[nodes], np.array(self._end)[nodes],
+                self._low[nodes], self._high[nodes])
+
+
+class BallTree(_Tree):
+    def __init__(self, points, leaf_size=LEAF_SIZE, p=2):
+        self._p = p # (utilisé par _add_bounds pendant la construction)
+        self._centres = [] # noeud -> centre de la sphère englobante
+        self._radii = [] # noeud -> rayon (distance normalisée)
+        super().__init__(points, leaf_size, p)
+
+    def _add_bounds(self, points):
+        centre = points.mean(axis=0)
+        self._centres.append(centre)
+        self._radii.append(float(np.max(distances(points, centre, self._p))))
+
+    def _finish(self):
+        self._centres = np.array(self._centres)
+        self._radii = np.array(self._radii)
+
+    def _lower_bounds(self, nodes, query):
+        # distance de query aux sphères (0 à l'intérieur, inégalité triangulaire)
+        return np.maximum(distances(self._centres[nodes], query, self._p) - self._radii[nodes], 0)
+
+
+def build_index(points, leaf_size=LEAF_SIZE, p=2):
+    # KDTree en petite dimension, BallTree sinon
+    points = np.asarray(points, dtype=float)
+    if points.shape[1] <= KD_MAX_DIMENSIONS:
+        return KDTree(points, leaf_size, p)
+    return BallTree(points, leaf_size, p)
+
+
+class RPForest:
+    def __init__(self, points, trees=FOREST_TREES, leaf_size=FOREST_LEAF_SIZE, p=2, seed=0):
+        if trees < 1 or leaf_size < 1:
+            raise ValueError('trees and leaf_size must be at least 1')
+        self._points = np.asarray(points, dtype=float)
+        self._p = p
+        self._leaf_size = leaf_size
+        rng = np.random.default_rng(seed)
+        self._trees = [self._build(rng) for _ in range(trees)]
+
+    def __len__(self):
+        return self._points.shape[0]
+
+    def _build(self, rng):
+        # (directions, seuils, enfants, feuilles) d'un arbre ; enfants[noeud] = (gauche, droite),
+        # ou (-1, n° de feuille) ; feuilles : (nb de feuilles, leaf_size) d'indices, complétées par -1
+        directions, thresholds, children, members = [], [], [], []
+        stack = [(self._add_node(directions, thresholds, children), np.arange(len(self)))]
+        while stack:
+            node, indices = stack.pop()
+            if indices.size <= self._leaf_size:
+                children[node] = (-1, len(members))
+                members.append(indices)
+                continue
+            # coupe à la médiane des projections sur une direction aléatoire
+            direction = rng.normal(size=self._points.shape[1])
+            projections = self._points[indices] @ direction
+            middle = indices.size // 2
+            order = np.argpartition(projections, middle)
+            directions[node] = direction
+            thresholds[node] = (projections[order[:middle]].max() + projections[order[middle]]) / 2
+            left = self._add_node(directions, thresholds, children)
+            right = self._add_node(directions, thresholds, children)
+            children[node] = (left, right)
+            stack.extend(((left, indices[order[:middle]]), (right, indices[order[middle:]])))
+
+        leaves = np.full((len(members), self._leaf_size), -1, dtype=np.intp)
+        for leaf, indices in enumerate(members):
+            leaves[leaf, :indices.size] = indices
+        return np.array(directions), np.array(thresholds), np.array(children, dtype=np.intp), leaves
+
+    def _add_node(self, directions, thresholds, children):
+        directions.append(np.zeros(self._points.shape[1]))
+        thresholds.append(0.0)
+        children.append((-1, -1))
+        return len(children) - 1
+
+    def _candidates(self, queries):
+        # (requêtes, arbres x leaf_size) : points des feuilles atteintes, sans doublons (-1 sinon)
+        found = []
+        for directions, thresholds, children, leaves in self._trees:
+            # toutes les requêtes descendent l'arbre ensemble, un niveau à la fois
+            nodes = np.zeros(len(queries), dtype=np.intp)
+            inner = np.flatnonzero(children[nodes, 0] >= 0)
+            while inner.size:
+                current = nodes[inner]
+                projections = np.einsum('ij,ij->i', queries[inner], directions[current])
+                nodes[inner] = children[current, (projections >= thresholds[current]).astype(np.intp)]
+                inner = inner[children[nodes[inner], 0] >= 0]
+            found.append(leaves[children[nodes, 1]])
+        candidates = np.sort(np.concatenate(found, axis=1), axis=1)
+        # un point trouvé par plusieurs arbres n'est gardé qu'une fois
+        candidates[:, 1:][candidates[:, 1:] == candidates[:, :-1]] = -1
+        return candidates
+
+    def query(self, query, k, max_dist=None):
+        # (distances, indices) des (au plus) k plus proches candidats à distance <= max_dist,
+        # triés par distance puis par indice
+        found_distances, found = self.query_many(np.asarray(query, dtype=float)[np.newaxis], k, max_dist)
+        kept = found[0] >= 0
+        return found_distances[0, kept], found[0, kept]
+
+    def query_many(self, queries, k, max_dist=None):
+        # (distances, indices) (requêtes, k), complétés par inf / -1 quand
+        # moins de k candidats sont trouvés à distance <= max_dist
+        queries = np.asarray(queries, dtype=float)
+        found_distances = np.full((len(queries), k), np.inf)
+        found = np.full((len(queries), k), -1, dtype=np.intp)
+        width = len(self._trees) * self._leaf_size
+        rows = max(1, FOREST_CHUNK_ELEMENTS // (width * self._points.shape[1]))
+        for start in range(0, len(queries), rows):
+            block = queries[start:start + rows]
+            candidates = self._candidates(block)
+            # distances exactes des candidats seulement (même calcul que distances())
+            candidate_distances = norms(self._points[candidates] - block[:, np.newaxis], self._p)
+            rejected = candidates < 0
+            if max_dist is not None:
+                rejected |= candidate_distances > max_dist
+            candidate_distances[rejected] = np.inf
+            candidates[rejected] = -1
+            order = np.lexsort((candidates, candidate_distances), axis=1)[:, :k]
+            rows_index = np.arange(len(block))[:, np.newaxis]
+            found_distances[start:start + len(block), :order.shape[1]] = candidate_distances[rows_index, order]
+            found[start:start + len(block), :order.shape[1]] = candidates[rows_index, order]
+        return found_distances, found